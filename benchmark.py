@@ -0,0 +1,468 @@
+from gc import collect
+from random import Random
+from sys import argv
+from time import perf_counter, sleep
+import tracemalloc
+
+from src.box.box import Box
+from src.cell.cell import Cell, CellType
+from src.dstar.dstar import DStarLite
+from src.flow.flow import FlowFields
+from src.graph.graph import Astar, BidirectionalAstar, Edge, Graph, GridGraph, Node
+from src.grid.grid import Grid
+from src.heuristic.heuristic import LandmarkHeuristic, ManhattanHeuristic, OctileHeuristic, ZeroHeuristic
+from src.hierarchy.hierarchy import HierarchicalSearch
+from src.jps.jps import JumpPointSearch
+from src.logger.logger import LoggerLevel, Logger
+from src.maze.maze import Maze
+from src.service.service import PathService
+
+"""
+  Micro benchmarks of the path finding, run with `python3 benchmark.py [name]`
+"""
+
+def benchmarkEngines(sizes=(40, 100, 200), queries=20):
+  print("Astar and JumpPointSearch on an open Room floor -- {} queries per size".format(queries))
+  print("{:>10}{:>18}{:>12}{:>12}{:>12}{:>14}{:>14}".format(
+    "size", "engine", "expanded", "pushed", "heap ops", "time (ms)", "path length"
+  ))
+
+  for size in sizes:
+    graph = gridGraph(size)
+    random = Random(size)
+    pairs = [(graph.cellOf(0), graph.cellOf(graph.size - 1))]
+    while len(pairs) < queries:
+      pairs.append((graph.cellOf(random.randrange(graph.size)), graph.cellOf(random.randrange(graph.size))))
+
+    for engine in [Astar, JumpPointSearch]:
+      search = engine(graph)
+      for start, target in pairs:
+        search.solve(start, target)
+      stats = search.totals
+
+      print("{:>10}{:>18}{:>12}{:>12}{:>12}{:>14.1f}{:>14}".format(
+        "{}x{}".format(size, size),
+        engine.__name__,
+        stats.expanded,
+        stats.pushed,
+        stats.heap_operations,
+        stats.time * 1000,
+        stats.path_length - stats.searches
+      ))
+
+def benchmarkFlows(mazes=((60, 4), (100, 8)), soldiers=50):
+  print("Astar and FlowFields, {} Soldiers from random Cells to every Room center".format(soldiers))
+  print("{:>10}{:>8}{:>14}{:>14}{:>14}".format("size", "rooms", "engine", "time (ms)", "path length"))
+
+  for size, rooms in mazes:
+    maze = Maze(size, size, rooms, flow_fields=False)
+    random = Random(size)
+    ids = list(maze.navigation.ids())
+    starts = [maze.navigation.cellOf(random.choice(ids)) for _ in range(soldiers)]
+
+    astar = Astar(maze.navigation)
+    length = 0
+    began = perf_counter()
+    for room in maze.rooms:
+      for start in starts:
+        length += len(astar.solve(start, room.center)) - 1
+    printFlowsRow(size, rooms, "Astar", perf_counter() - began, length)
+
+    flows = FlowFields(maze.navigation)
+    length = 0
+    began = perf_counter()
+    for room in maze.rooms:
+      for start in starts:
+        length += len(flows.route(start, room.center)) - 1
+    printFlowsRow(size, rooms, "FlowFields", perf_counter() - began, length)
+
+def printFlowsRow(size, rooms, engine, elapsed, length):
+  print("{:>10}{:>8}{:>14}{:>14.1f}{:>14}".format("{}x{}".format(size, size), rooms, engine, elapsed * 1000, length))
+
+def benchmarkGeneration(sizes=(40, 200, 1000), pairs=2, mazes=((40, 2, 0), (100, 6, 0), (200, 8, 0), (200, 32, 4)), implicit_mazes=((1000, 12, 2),)):
+  print("Astar and BidirectionalAstar connecting {} Room centers across every Cell of the map".format(pairs))
+  print("{:>10}{:>22}{:>12}{:>14}".format("size", "engine", "expanded", "time (ms)"))
+
+  for size in sizes:
+    graph = gridGraph(size)
+    random = Random(size)
+    ends = []
+    while len(ends) < pairs:
+      first = graph.nodeAt(random.randint(1, size // 4), random.randint(1, size // 4))
+      second = graph.nodeAt(random.randint(3 * size // 4, size - 2), random.randint(3 * size // 4, size - 2))
+      ends.append((first.cell, second.cell))
+
+    for engine in [Astar, BidirectionalAstar]:
+      search = engine(graph)
+      expanded = 0
+      began = perf_counter()
+      for start, target in ends:
+        search.solve(start, target)
+        expanded += search.expanded
+      elapsed = perf_counter() - began
+
+      print("{:>10}{:>22}{:>12}{:>14.1f}".format(
+        "{}x{}".format(size, size),
+        engine.__name__,
+        expanded,
+        elapsed * 1000
+      ))
+
+  print("")
+  print("Maze generation, then the neighbours of the passable Nodes found again on their own")
+  print("{:>10}{:>8}{:>8}{:>12}{:>10}{:>16}{:>18}".format(
+    "size", "rooms", "loops", "graph", "nodes", "maze (ms)", "neighbours (ms)"
+  ))
+  rows = [(row, False) for row in mazes] + [(row, True) for row in implicit_mazes]
+  for (size, rooms, loops), implicit in rows:
+    began = perf_counter()
+    maze = Maze(size, size, rooms, loops=loops, implicit=implicit)
+    generated = perf_counter()
+    nodes = maze.uniqueNodesSharedCells()
+    connected = perf_counter()
+    print("{:>10}{:>8}{:>8}{:>12}{:>10}{:>16.1f}{:>18.1f}".format(
+      "{}x{}".format(size, size),
+      rooms,
+      loops,
+      type(maze.navigation).__name__,
+      len(nodes),
+      (generated - began) * 1000,
+      (connected - generated) * 1000
+    ))
+
+"""
+  The peak memory is taken while the Graph is built, the held one is what
+  the Graph and its Grid keep once the Nodes it was built from are collected
+"""
+def benchmarkGraph(sizes=(100, 300), implicit_sizes=(1000, 2000)):
+  print("Building an open size x size floor, then Astar between opposite corners")
+  print("{:>12}{:>12}{:>14}{:>12}{:>12}{:>14}".format("size", "graph", "build (ms)", "peak (MB)", "held (MB)", "query (ms)"))
+
+  for size in sizes + implicit_sizes:
+    if size in sizes:
+      tracemalloc.start()
+      began = perf_counter()
+      graph = gridGraph(size)
+      built = perf_counter()
+      collect()
+      memory = tracemalloc.get_traced_memory()
+      tracemalloc.stop()
+      printGraphRow(size, "Graph", graph, built - began, memory)
+
+    tracemalloc.start()
+    began = perf_counter()
+    grid = Grid(size, size)
+    grid.fill(CellType.FLOOR, 0, size, 0, size)
+    graph = GridGraph(grid, [CellType.FLOOR])
+    built = perf_counter()
+    memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    printGraphRow(size, "GridGraph", graph, built - began, memory)
+
+def printGraphRow(size, store, graph, build, memory):
+  search = Astar(graph)
+  began = perf_counter()
+  path = search.solve(graph.cellOf(0), graph.cellOf(graph.size - 1))
+  query = perf_counter() - began
+  if not len(path) == 2 * size - 1:
+    print("Unexpected path of {} Nodes on {}".format(len(path), store))
+    exit(1)
+  print("{:>12}{:>12}{:>14.1f}{:>12.1f}{:>12.1f}{:>14.1f}".format(
+    "{}x{}".format(size, size),
+    store,
+    build * 1000,
+    memory[1] / 1000000,
+    memory[0] / 1000000,
+    query * 1000
+  ))
+
+def benchmarkGrid(sizes=(100, 400, 1000), rooms=20):
+  print("Marking walls, Room floors and a Box in every Room, then scanning the passable Cells and the occupants")
+  print("{:>10}{:>16}{:>14}{:>14}{:>12}{:>12}".format("size", "store", "mark (ms)", "scan (ms)", "passable", "occupants"))
+
+  for size in sizes:
+    random = Random(size)
+    floors = []
+    while len(floors) < rooms:
+      top = random.randint(1, size - 12)
+      left = random.randint(1, size - 12)
+      floors.append((top, top + 10, left, left + 10))
+
+    began = perf_counter()
+    cells = [[Cell(CellType.SPACE, i, j) for j in range(size)] for i in range(size)]
+    for row in cells:
+      row[0].kind = CellType.WALL
+      row[size - 1].kind = CellType.WALL
+    for cell in cells[0] + cells[size - 1]:
+      cell.kind = CellType.WALL
+    for top, bottom, left, right in floors:
+      for row in cells[top:bottom]:
+        for cell in row[left:right]:
+          cell.kind = CellType.FLOOR
+    for top, bottom, left, right in floors:
+      cells[top + 5][left + 5].obj = Box()
+    marked = perf_counter()
+    passable = [cell for row in cells for cell in row if cell.isPassable()]
+    occupants = [cell.obj for cell in passable if not cell.isEmpty()]
+    scanned = perf_counter()
+    printGridRow(size, "List<Cell>", marked - began, scanned - marked, passable, occupants)
+
+    began = perf_counter()
+    grid = Grid(size, size)
+    grid.border(CellType.WALL)
+    for top, bottom, left, right in floors:
+      grid.fill(CellType.FLOOR, top, bottom, left, right)
+    for top, bottom, left, right in floors:
+      grid.markOccupant(top + 5, left + 5, Box())
+    marked = perf_counter()
+    passable = grid.pointsOf([CellType.FLOOR, CellType.PATH, CellType.ENTRANCE])
+    occupants = grid.occupantsIn(0, size, 0, size, CellType.FLOOR)
+    scanned = perf_counter()
+    printGridRow(size, "Grid", marked - began, scanned - marked, passable, occupants)
+
+def printGridRow(size, store, mark, scan, passable, occupants):
+  print("{:>10}{:>16}{:>14.1f}{:>14.1f}{:>12}{:>12}".format(
+    "{}x{}".format(size, size),
+    store,
+    mark * 1000,
+    scan * 1000,
+    len(passable),
+    len(occupants)
+  ))
+
+def benchmarkHeuristics(mazes=((60, 4), (100, 8)), queries=20):
+  print("Astar with every heuristic between random Cells -- {} queries per Maze".format(queries))
+  print("{:>10}{:>8}{:>22}{:>12}{:>14}{:>14}".format(
+    "size", "rooms", "heuristic", "expanded", "time (ms)", "path cost"
+  ))
+
+  for size, rooms in mazes:
+    maze = Maze(size, size, rooms)
+    random = Random(size)
+    cells = [maze.navigation.cellOf(node) for node in maze.navigation.ids()]
+    pairs = [(random.choice(cells), random.choice(cells)) for _ in range(queries)]
+
+    centers = [maze.navigation.idOf(room.center) for room in maze.rooms]
+    landmarks = LandmarkHeuristic(maze.navigation, 4, centers)
+    for heuristic in [ManhattanHeuristic(), OctileHeuristic(), ZeroHeuristic(), landmarks]:
+      astar = Astar(maze.navigation, heuristic)
+      expanded = 0
+      cost = 0
+      began = perf_counter()
+      for start, target in pairs:
+        astar.solve(start, target)
+        cost += astar.costOf(astar.target)
+        expanded += astar.expanded
+      elapsed = perf_counter() - began
+
+      print("{:>10}{:>8}{:>22}{:>12}{:>14.1f}{:>14}".format(
+        "{}x{}".format(size, size),
+        rooms,
+        type(heuristic).__name__,
+        expanded,
+        elapsed * 1000,
+        cost
+      ))
+
+def benchmarkHierarchy(mazes=((60, 4), (100, 8))):
+  print("Astar and HierarchicalSearch between every two Room centers")
+  print("{:>10}{:>8}{:>22}{:>12}{:>14}{:>14}".format(
+    "size", "rooms", "engine", "expanded", "time (ms)", "path length"
+  ))
+
+  for size, rooms in mazes:
+    maze = Maze(size, size, rooms)
+    pairs = []
+    for room in maze.rooms:
+      for other in maze.rooms:
+        if not room == other:
+          pairs.append((room.center, other.center))
+
+    for engine in [Astar, HierarchicalSearch]:
+      search = engine(maze.navigation)
+      expanded = 0
+      length = 0
+      began = perf_counter()
+      for start, target in pairs:
+        length += len(search.solve(start, target)) - 1
+        expanded += search.expanded
+      elapsed = perf_counter() - began
+
+      print("{:>10}{:>8}{:>22}{:>12}{:>14.1f}{:>14}".format(
+        "{}x{}".format(size, size),
+        rooms,
+        engine.__name__,
+        expanded,
+        elapsed * 1000,
+        length
+      ))
+
+def benchmarkReplan(sizes=(40, 100), blocks=20):
+  print("DStarLite searching again and repairing, a Cell ahead gets blocked {} times on the way".format(blocks))
+  print("{:>10}{:>14}{:>12}{:>14}".format("size", "on a block", "expanded", "time (ms)"))
+
+  for size in sizes:
+    graph = gridGraph(size)
+    start = graph.cellOf(0)
+    target = graph.cellOf(graph.size - 1)
+
+    for repair in [False, True]:
+      for node in graph.ids():
+        graph.cellOf(node).removeObj()
+      search = DStarLite(graph)
+      search.plan(start, target)
+      at = start
+      path = search.path()
+      expanded = 0
+      left = blocks
+      began = perf_counter()
+      while not at.samePosition(target):
+        blocked = left > 0 and len(path) > 3
+        if blocked:
+          path[2].cell.obj = Box()
+          left -= 1
+        at = path[1].cell
+        if blocked and not repair:
+          expanded += search.expanded
+          search.plan(at, target)
+          search.sense([cell for cell in map(graph.cellOf, graph.ids()) if not cell.isEmpty()])
+        else:
+          search.moveTo(at)
+          search.sense([node.cell for node in graph.nodeBy(at).neighbours])
+        path = search.path()
+      expanded += search.expanded
+      elapsed = perf_counter() - began
+
+      print("{:>10}{:>14}{:>12}{:>14.1f}".format(
+        "{}x{}".format(size, size),
+        "repair" if repair else "search again",
+        expanded,
+        elapsed * 1000
+      ))
+
+def benchmarkReset(sizes=(40, 100, 200, 400), repeats=1000):
+  print("Astar.resetAlgorithm -- average over {} resets".format(repeats))
+  print("{:>10}{:>10}{:>16}".format("size", "nodes", "reset (us)"))
+
+  for size in sizes:
+    graph = gridGraph(size)
+    astar = Astar(graph)
+    corner = graph.cellOf(0)
+    opposite = graph.cellOf(graph.size - 1)
+    elapsed = 0
+
+    count = repeats
+    while count > 0:
+      astar.updateNodeToStateStartBy(corner)
+      astar.updateNodeToStateTargetBy(opposite)
+      began = perf_counter()
+      astar.resetAlgorithm()
+      elapsed += perf_counter() - began
+      count -= 1
+
+    print("{:>10}{:>10}{:>16.3f}".format(
+      "{}x{}".format(size, size),
+      graph.size,
+      elapsed / repeats * 1000000
+    ))
+
+def benchmarkService(size=100, rooms=8, queries=200, workers=(1, 2, 4)):
+  print("Random queries solved one after the other and by the PathService -- {} queries".format(queries))
+  print("{:>10}{:>10}{:>14}{:>14}".format("size", "workers", "time (ms)", "path length"))
+
+  maze = Maze(size, size, rooms)
+  graph = maze.navigation
+  cells = [graph.cellOf(node) for node in graph.ids()]
+  random = Random(size)
+  pairs = [(random.choice(cells), random.choice(cells)) for _ in range(queries)]
+
+  search = Astar(graph)
+  length = 0
+  began = perf_counter()
+  for start, target in pairs:
+    length += len(search.solve(start, target))
+  printServiceRow(size, 0, perf_counter() - began, length)
+
+  for count in workers:
+    service = PathService(graph, count)
+    service.request(None, pairs[0][0], pairs[0][1])
+    while service.result(None) == None:
+      sleep(0.01)
+
+    length = 0
+    began = perf_counter()
+    for owner, pair in enumerate(pairs):
+      service.request(owner, pair[0], pair[1])
+    done = 0
+    while done < queries:
+      for owner in range(queries):
+        path = service.result(owner)
+        if not path == None:
+          length += len(path)
+          done += 1
+      sleep(0.001)
+    printServiceRow(size, count, perf_counter() - began, length)
+    service.shutdown()
+
+def printServiceRow(size, workers, elapsed, length):
+  print("{:>10}{:>10}{:>14.1f}{:>14}".format("{}x{}".format(size, size), workers, elapsed * 1000, length))
+
+"""
+  A size x size floor, every Cell is connected to its 4 neighbours
+"""
+def gridGraph(size):
+  grid = Grid(size, size, CellType.FLOOR)
+  rows = []
+  nodes = []
+  edges = []
+
+  i = 0
+  while i < size:
+    row = []
+
+    j = 0
+    while j < size:
+      node = Node(grid.cellAt(i, j))
+      row.append(node)
+      nodes.append(node)
+      if i > 0:
+        connect(node, rows[i - 1][j], edges)
+      if j > 0:
+        connect(node, row[j - 1], edges)
+      j += 1
+
+    rows.append(row)
+    i += 1
+
+  return Graph(nodes, edges, grid)
+
+def connect(node, other, edges):
+  node.addNeighbour(other)
+  other.addNeighbour(node)
+  edges.append(Edge(node, other, 1))
+
+benchmarks = {
+  "engines": benchmarkEngines,
+  "flows": benchmarkFlows,
+  "generation": benchmarkGeneration,
+  "graph": benchmarkGraph,
+  "grid": benchmarkGrid,
+  "heuristics": benchmarkHeuristics,
+  "hierarchy": benchmarkHierarchy,
+  "replan": benchmarkReplan,
+  "reset": benchmarkReset,
+  "service": benchmarkService
+}
+
+if __name__ == "__main__":
+  Logger(LoggerLevel.INFO)
+  names = argv[1:]
+  if len(names) == 0:
+    names = list(benchmarks.keys())
+
+  for name in names:
+    if not name in benchmarks:
+      print("Unknown benchmark {}, expected one of {}".format(name, ", ".join(benchmarks.keys())))
+      exit(1)
+    benchmarks[name]()
+    print("")
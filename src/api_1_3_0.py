@@ -1,10 +1,14 @@
+from atexit import register
 from json import load
 from sys import argv
 from time import sleep
 
 from src.box.box import Box
 from src.bullet.bullet import Bullet
+from src.graph.graph import Astar, BidirectionalAstar
 from src.grenade.grenade import Grenade
+from src.hierarchy.hierarchy import HierarchicalSearch
+from src.jps.jps import JumpPointSearch
 from src.logger.logger import LoggerLevel, Logger
 from src.maze.maze import Maze
 from src.package.package import BulletPackage, GrenadePackage, HealthPackage
@@ -49,6 +53,18 @@ def getDefensiveSoldier(health, team_id):
   result = DefensiveSoldier(health, team_id)
   return result
 
+def getEngine(name):
+  engines = {
+    "astar": Astar,
+    "bidirectional": BidirectionalAstar,
+    "hierarchical": HierarchicalSearch,
+    "jps": JumpPointSearch
+  }
+  if not name in engines:
+    Logger().info("getEngine", "UNKNOWN PATH FINDING ENGINE {}".format(name))
+    exit(1)
+  return engines[name]
+
 def getGrenadePackages(packages, per_package, damage_per_grenade): 
   msg = "Init -- {} greanade packages -- {} grenades per package -- {} damage per grenade"
   msg = msg.format(packages, per_package, damage_per_grenade)
@@ -139,16 +155,22 @@ def placeBoxes(maze, boxes):
   for box in boxes:
     maze.placeBox(box)
 
-def placeTeams(maze, teams):
+def placeTeams(maze, teams, plan_once=False):
   msg = "Distributing {} teams among the rooms".format(len(teams))
   Logger().debug("placeTeams", msg)
   
   for team in teams:
     for soldier in team.soldiers:
-      nodes = maze.uniqueNodesSharedCells()
-      edges = maze.edges
-      soldier.initAstar(nodes, edges)
+      soldier.initAstar(maze.navigation, maze.heuristic)
       soldier.rooms = maze.rooms
+      soldier.routes = maze.routes
+      soldier.service = maze.service
+      soldier.paths = maze.paths
+      soldier.budget = maze.budget
+      soldier.flows = maze.flows
+      soldier.nearest = maze.nearest
+      soldier.plan_once = plan_once
+      soldier.planner = maze.planner
     
     maze.placeTeam(team)
 
@@ -170,13 +192,27 @@ def getMaze(config):
   boxes = getBoxes(config["boxes"])
   teams = getTeams(config["soldiers"], config["soldier"]["max_health"])
   
-  result = Maze(config["height"], config["width"], config["rooms"])
+  result = Maze(
+    config["height"],
+    config["width"],
+    config["rooms"],
+    config["pathfinding"]["cache_capacity"],
+    getEngine(config["pathfinding"]["engine"]),
+    config["pathfinding"]["flow_fields"],
+    config["room_loops"],
+    config["pathfinding"]["cooperative"],
+    config["pathfinding"]["implicit_graph"],
+    config["pathfinding"]["planning_budget"],
+    config["pathfinding"]["service_workers"],
+    config["pathfinding"]["landmarks"]
+  )
   
   placePackages(result, bullet_packages)
   placePackages(result, grenade_packages)
   placePackages(result, health_packages)
   placeBoxes(result, boxes)
-  placeTeams(result, teams)
+  placeTeams(result, teams, config["pathfinding"]["plan_once"])
+  register(result.shutdown)
   return result
 
 def setLogger():
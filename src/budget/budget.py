@@ -0,0 +1,70 @@
+from src.logger.logger import Logger
+
+"""
+  Expansions the Soldiers may spend on their searches during a tick,
+  shared by all of them. A search of their own Astar that runs out of it
+  is suspended and goes on at the next tick, so a hard query can not stall
+  the tick. The searches that can not be suspended are charged once over,
+  which may leave the budget below zero until the next refill.
+"""
+class PlanningBudget:
+
+  """
+    - left is Integer, expansions left for the current tick
+    - log is Logger
+    - per_tick is Integer
+    - spent is Integer, expansions spent over every tick
+    - suspended is Integer, searches suspended for lack of budget
+    - ticks is Integer
+  """
+  def __init__(self, per_tick):
+    self._log = Logger()
+    self._left = per_tick
+    self._per_tick = per_tick
+    self._spent = 0
+    self._suspended = 0
+    self._ticks = 0
+    self._log.debug("PlanningBudget", "Init Object -- {} expansions a tick".format(per_tick))
+
+  @property
+  def left(self):
+    return self._left
+
+  @property
+  def per_tick(self):
+    return self._per_tick
+
+  @property
+  def spent(self):
+    return self._spent
+
+  @property
+  def suspended(self):
+    return self._suspended
+
+  @property
+  def ticks(self):
+    return self._ticks
+
+  def exhausted(self):
+    return self._left <= 0
+
+  def refill(self):
+    self._left = self._per_tick
+    self._ticks += 1
+
+  def spend(self, expansions):
+    self._left -= expansions
+    self._spent += expansions
+
+  def suspend(self):
+    self._suspended += 1
+
+  def __str__(self):
+    return "{} of {} expansions left -- {} spent over {} ticks -- {} suspended".format(
+      self._left,
+      self._per_tick,
+      self._spent,
+      self._ticks,
+      self._suspended
+    )
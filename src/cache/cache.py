@@ -0,0 +1,182 @@
+from collections import OrderedDict
+
+from src.graph.graph import Astar, BidirectionalAstar
+from src.logger.logger import Logger
+from src.soldier.soldier import Soldier
+
+"""
+  Least recently used cache of the paths found on the shared Graph.
+  A path stays cached until one of the Cells between its ends changes its
+  kind or gets or loses a Package. The ends are expected to be occupied,
+  and Soldiers only pass through, the one following the path checks every
+  next Cell before it steps on it.
+  A start that lies on a cached path to the same target is served with
+  the rest of that path, as every part of a shortest path is one too.
+"""
+class PathCache:
+  default_capacity = 256
+
+  """
+    - astar is Astar, BidirectionalAstar, JumpPointSearch or HierarchicalSearch, computes the paths that are missing
+    - capacity is Integer
+    - cells is Dictionary<(Integer, Integer), Set<((Integer, Integer), (Integer, Integer))>>
+    - evictions is Integer
+    - expanded is Integer, Nodes expanded for the last path asked for, 0 when it was cached
+    - hits is Integer
+    - invalidations is Integer
+    - log is Logger
+    - misses is Integer
+    - paths is OrderedDict<((Integer, Integer), (Integer, Integer)), List<Cell>>
+    - positions is Dictionary<((Integer, Integer), (Integer, Integer)), Dictionary<(Integer, Integer), Integer>>
+    - targets is Dictionary<(Integer, Integer), Set<((Integer, Integer), (Integer, Integer))>>
+  """
+  def __init__(self, graph, capacity=None, engine=Astar, heuristic=None):
+    if capacity == None:
+      capacity = PathCache.default_capacity
+    self._log = Logger()
+    if heuristic == None or not issubclass(engine, (Astar, BidirectionalAstar)):
+      self._astar = engine(graph)
+    else:
+      self._astar = engine(graph, heuristic)
+    self._capacity = capacity
+    self._cells = dict()
+    self._evictions = 0
+    self._expanded = 0
+    self._hits = 0
+    self._invalidations = 0
+    self._misses = 0
+    self._paths = OrderedDict()
+    self._positions = dict()
+    self._targets = dict()
+    self._log.debug("PathCache", "Init Object -- capacity of {} paths".format(capacity))
+
+  @property
+  def capacity(self):
+    return self._capacity
+
+  @property
+  def evictions(self):
+    return self._evictions
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def hits(self):
+    return self._hits
+
+  @property
+  def invalidations(self):
+    return self._invalidations
+
+  @property
+  def misses(self):
+    return self._misses
+
+  @property
+  def size(self):
+    return len(self._paths)
+
+  """
+    Counters of the searches run for the missing paths
+  """
+  @property
+  def stats(self):
+    return self._astar.totals
+
+  def cellChanged(self, cell):
+    self._invalidate(cell.point.x, cell.point.y)
+
+  def occupantChanged(self, cell, previous):
+    if isinstance(cell.obj, Soldier) or isinstance(previous, Soldier):
+      return
+    self._invalidate(cell.point.x, cell.point.y)
+
+  """
+    The Cells from the start to the target, both included, or None when the
+    target can not be reached
+  """
+  def path(self, start, target):
+    key = ((start.point.x, start.point.y), (target.point.x, target.point.y))
+    self._expanded = 0
+    
+    if key in self._paths:
+      self._hits += 1
+      self._paths.move_to_end(key)
+      return self._paths[key]
+    
+    for other in self._targets.get(key[1], ()):
+      index = self._positions[other].get(key[0])
+      if not index == None:
+        self._hits += 1
+        self._paths.move_to_end(other)
+        return self._paths[other][index:]
+    
+    self._misses += 1
+    nodes = self._astar.solve(start, target)
+    self._expanded = self._astar.expanded
+    if len(nodes) == 0:
+      return None
+    
+    result = [node.cell for node in nodes]
+    self._store(key, result)
+    return result
+
+  """
+    Drops the paths through any Cell with top <= x < bottom and
+    left <= y < right, looking at the Cells of the cached paths only
+  """
+  def regionChanged(self, kind, top, bottom, left, right):
+    for x, y in list(self._cells):
+      if top <= x < bottom and left <= y < right:
+        self._invalidate(x, y)
+
+  def _invalidate(self, x, y):
+    keys = self._cells.get((x, y))
+    if keys == None:
+      return
+
+    for key in list(keys):
+      self._remove(key)
+      self._invalidations += 1
+
+  def _remove(self, key):
+    path = self._paths.pop(key)
+    del self._positions[key]
+    self._targets[key[1]].discard(key)
+    if len(self._targets[key[1]]) == 0:
+      del self._targets[key[1]]
+    
+    for cell in path[1:-1]:
+      keys = self._cells[(cell.point.x, cell.point.y)]
+      keys.discard(key)
+      if len(keys) == 0:
+        del self._cells[(cell.point.x, cell.point.y)]
+
+  def _store(self, key, path):
+    if self._capacity <= 0:
+      return
+    
+    while len(self._paths) >= self._capacity:
+      self._remove(next(iter(self._paths)))
+      self._evictions += 1
+    
+    self._paths[key] = path
+    self._positions[key] = dict()
+    for i, cell in enumerate(path):
+      self._positions[key].setdefault((cell.point.x, cell.point.y), i)
+    self._targets.setdefault(key[1], set()).add(key)
+    
+    for cell in path[1:-1]:
+      self._cells.setdefault((cell.point.x, cell.point.y), set()).add(key)
+
+  def __str__(self):
+    return "{} of {} paths -- {} hits -- {} misses -- {} evictions -- {} invalidations".format(
+      self.size,
+      self._capacity,
+      self._hits,
+      self._misses,
+      self._evictions,
+      self._invalidations
+    )
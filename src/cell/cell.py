@@ -12,17 +12,26 @@ class CellType(Enum):
   ENTRANCE = 4
   
 class Cell:
+  symbols = {
+    CellType.SPACE: ".",
+    CellType.WALL: "#",
+    CellType.PATH: " ",
+    CellType.ENTRANCE: "E"
+  }
 
   """
     - kind is CellType
     - log is Logger
+    - observers is List<Object> notified with cellChanged(Cell) when the
+      kind changes and with occupantChanged(Cell, Object) when obj changes
     - point is Point
     - obj is Soldier    
   """
   def __init__(self, kind, x, y):
+    self._observers = None
+    self._obj = None
     self.kind = kind
     self.point = (x, y)
-    self._obj = None
 
   @property
   def kind(self):
@@ -39,47 +48,58 @@ class Cell:
   @kind.setter
   def kind(self, val):
     self._kind = val
+    self._kindChanged()
 
   @obj.setter
   def obj(self, val):
+    previous = self._obj
     self._obj = val
+    self._occupantChanged(previous)
 
   @point.setter
   def point(self, coords):
     self._point = Point(coords[0], coords[1])
 
+  def addObserver(self, observer):
+    if self._observers == None:
+      self._observers = []
+    self._observers.append(observer)
+
   def containsBulletPackage(self):
     if not self.isEmpty():
-      return isinstance(self._obj, BulletPackage)
+      return isinstance(self.obj, BulletPackage)
     return False
 
   def containsGrenadePackage(self):
     if not self.isEmpty():
-      return isinstance(self._obj, GrenadePackage)
+      return isinstance(self.obj, GrenadePackage)
     return False
   
   def containsHealthPackage(self):
     if not self.isEmpty():
-      return isinstance(self._obj, HealthPackage)
+      return isinstance(self.obj, HealthPackage)
     return False
 
   def containsSoldier(self):
     if not self.isEmpty():
-      return isinstance(self._obj, Soldier)
+      return isinstance(self.obj, Soldier)
     return False
   
   def isEmpty(self):
-    return self._obj == None
+    return self.obj == None
+
+  def isEntrance(self):
+    return self.kind == CellType.ENTRANCE
 
   def isFloor(self):
-    return self._kind == CellType.FLOOR
+    return self.kind == CellType.FLOOR
   
   def isPassable(self):
-    result = self._kind == CellType.FLOOR or self._kind == CellType.PATH
-    return result or self._kind == CellType.ENTRANCE
+    result = self.kind == CellType.FLOOR or self.kind == CellType.PATH
+    return result or self.kind == CellType.ENTRANCE
   
   def isPath(self):
-    return self._kind == CellType.PATH
+    return self.kind == CellType.PATH
   
   def isTraversable(self):
     if self.isPassable():
@@ -87,20 +107,22 @@ class Cell:
     return False
 
   def removeObj(self):
-    self._obj = None
+    self.obj = None
 
   def samePosition(self, other):
     return self._point == other.point
+
+  def _kindChanged(self):
+    if not self._observers == None:
+      for observer in self._observers:
+        observer.cellChanged(self)
+
+  def _occupantChanged(self, previous):
+    if not self._observers == None:
+      for observer in self._observers:
+        observer.occupantChanged(self, previous)
   
   def __str__(self):
     if not self.obj == None:
       return str(self.obj)
-    if self.kind == CellType.SPACE:
-      return "."
-    if self.kind == CellType.WALL:
-      return "#"
-    if self.kind == CellType.PATH:
-      return " "
-    if self.kind == CellType.ENTRANCE:
-      return "E"
-    return " "
\ No newline at end of file
+    return Cell.symbols.get(self.kind, " ")
\ No newline at end of file
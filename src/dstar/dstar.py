@@ -0,0 +1,231 @@
+from time import perf_counter
+
+from src.graph.graph import PriorityNodes
+from src.heuristic.heuristic import ManhattanHeuristic
+from src.logger.logger import Logger
+from src.stats.stats import SearchStats
+
+"""
+  D* Lite on the shared Graph. The search runs backward from the goal, so
+  while the goal stays the same, moving the start and Cells getting blocked
+  or freed only repair the part of the search they affect instead of
+  starting it over.
+"""
+class DStarLite:
+  infinite = float("inf")
+
+  """
+    - blocked is Set<Integer>, ids of the Nodes seen not traversable
+    - expanded is Integer, Nodes expanded since the last plan
+    - g is Dictionary<Integer, Number>, distance to the goal by Node id
+    - goal is Integer, id of the goal
+    - graph is Graph
+    - heuristic is ManhattanHeuristic, OctileHeuristic or ZeroHeuristic
+    - km is Number, heuristic offset gathered from the moves of the start
+    - log is Logger
+    - pq is PriorityNodes of ids, keyed by (Number, Number)
+    - rhs is Dictionary<Integer, Number>, one step lookahead of g
+    - start is Integer, id of the start
+    - totals is SearchStats, every path asked for so far
+    - updated is Integer, Nodes updated since the last plan
+  """
+  def __init__(self, graph, heuristic=None):
+    if heuristic == None:
+      heuristic = ManhattanHeuristic()
+    self._log = Logger()
+    self._graph = graph
+    self._blocked = set()
+    self._expanded = 0
+    self._g = dict()
+    self._goal = None
+    self._heuristic = heuristic
+    self._km = 0
+    self._pq = PriorityNodes()
+    self._rhs = dict()
+    self._start = None
+    self._totals = SearchStats()
+    self._updated = 0
+    self._log.debug("DStarLite", "Init Object -- {} Nodes".format(graph.size))
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def goal(self):
+    return self._nodeOf(self._goal)
+
+  @property
+  def start(self):
+    return self._nodeOf(self._start)
+
+  @property
+  def totals(self):
+    return self._totals.copy()
+
+  @property
+  def updated(self):
+    return self._updated
+
+  def moveTo(self, cell):
+    start = self._graph.idOf(cell)
+    self._km += self._estimate(self._start, start)
+    self._start = start
+    if self._isBlocked(start):
+      self._flip(start)
+
+  """
+    Nodes from the start to the goal, both included, following the least
+    distances, or an empty list when the goal can not be reached
+  """
+  def path(self):
+    began = perf_counter()
+    expanded = self._expanded
+    self._computeShortestPath()
+    result = self._descend()
+    self._totals.add(SearchStats(1, self._expanded - expanded, 0, 0, 0, len(result), perf_counter() - began))
+    return result
+
+  def plan(self, start, goal):
+    self._blocked = set()
+    self._expanded = 0
+    self._g = dict()
+    self._goal = self._graph.idOf(goal)
+    self._km = 0
+    self._pq = PriorityNodes()
+    self._rhs = {self._goal: 0}
+    self._start = self._graph.idOf(start)
+    self._updated = 0
+    self._pq.insert(self._goal, self._keyOf(self._goal))
+
+  """
+    Compares the given Cells, and every Cell seen blocked before, with what
+    is known about them and updates the Nodes around the ones that changed
+  """
+  def sense(self, cells):
+    changed = []
+    for cell in cells:
+      node = self._graph.idOf(cell)
+      if not node == None and not self._isBlocked(node) == self._looksBlocked(node):
+        changed.append(node)
+
+    for node in self._blocked:
+      if not self._looksBlocked(node) and not node in changed:
+        changed.append(node)
+
+    for node in changed:
+      self._flip(node)
+
+  """
+    (id, cost) of the arcs leaving the id node, none of them when the node
+    is blocked and none to a blocked Node
+  """
+  def _arcsOf(self, node):
+    if node in self._blocked:
+      return []
+    return [(other, cost) for other, cost in self._graph.arcsOf(node) if not other in self._blocked]
+
+  def _computeShortestPath(self):
+    while not self._pq.empty():
+      top = self._pq.topPriority()
+      if not top < self._keyOf(self._start) and self._rhsOf(self._start) == self._gOf(self._start):
+        return
+
+      node = self._pq.pop()
+      key = self._keyOf(node)
+      if top < key:
+        self._pq.insert(node, key)
+
+      elif self._gOf(node) > self._rhsOf(node):
+        self._expanded += 1
+        self._g[node] = self._rhsOf(node)
+        for neighbour in self._graph.neighboursOf(node):
+          self._updateVertex(neighbour)
+
+      else:
+        self._expanded += 1
+        self._g[node] = DStarLite.infinite
+        self._updateVertex(node)
+        for neighbour in self._graph.neighboursOf(node):
+          self._updateVertex(neighbour)
+
+  """
+    Follows the least distances from the start down to the goal
+  """
+  def _descend(self):
+    if self._gOf(self._start) == DStarLite.infinite:
+      return []
+
+    result = [self._start]
+    current = self._start
+    while not current == self._goal:
+      best = None
+      best_cost = DStarLite.infinite
+      for node, cost in self._arcsOf(current):
+        cost += self._gOf(node)
+        if cost < best_cost:
+          best = node
+          best_cost = cost
+
+      if best == None or len(result) > self._graph.size:
+        return []
+      result.append(best)
+      current = best
+    return [self._graph.nodeOf(node) for node in result]
+
+  def _estimate(self, node, other):
+    return self._heuristic.estimate(self._graph.coordinatesOf(node), self._graph.coordinatesOf(other))
+
+  def _flip(self, node):
+    if self._isBlocked(node):
+      self._blocked.discard(node)
+    else:
+      self._blocked.add(node)
+    self._updateVertex(node)
+    for neighbour in self._graph.neighboursOf(node):
+      self._updateVertex(neighbour)
+
+  def _gOf(self, node):
+    return self._g.get(node, DStarLite.infinite)
+
+  def _isBlocked(self, node):
+    return node in self._blocked
+
+  def _keyOf(self, node):
+    least = min(self._gOf(node), self._rhsOf(node))
+    return (least + self._estimate(self._start, node) + self._km, least)
+
+  """
+    The start holds the Soldier itself and the goal may hold what it is
+    looking for, neither of them blocks
+  """
+  def _looksBlocked(self, node):
+    if node == self._start or node == self._goal:
+      return False
+    return not self._graph.cellOf(node).isTraversable()
+
+  def _nodeOf(self, node):
+    if node == None:
+      return None
+    return self._graph.nodeOf(node)
+
+  def _rhsOf(self, node):
+    return self._rhs.get(node, DStarLite.infinite)
+
+  def _updateVertex(self, node):
+    self._updated += 1
+    if not node == self._goal:
+      least = DStarLite.infinite
+      if not node in self._blocked:
+        for neighbour, cost in self._graph.arcsOf(node):
+          if neighbour in self._blocked:
+            continue
+          cost += self._g.get(neighbour, DStarLite.infinite)
+          if cost < least:
+            least = cost
+      self._rhs[node] = least
+
+    if self._pq.contains(node):
+      self._pq.remove(node)
+    if not self._gOf(node) == self._rhsOf(node):
+      self._pq.insert(node, self._keyOf(node))
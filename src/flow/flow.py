@@ -0,0 +1,170 @@
+from array import array
+from collections import deque, OrderedDict
+from time import perf_counter
+
+from src.logger.logger import Logger
+from src.stats.stats import SearchStats
+
+"""
+  Distance fields toward the destinations many Soldiers head for.
+  A field holds the number of steps from every Node of the shared Graph
+  to its destination, found with one breadth first search from the
+  destination, so any Soldier reaches it by stepping to the neighbour of
+  the lowest distance. Fields depend on the layout of the Maze only, they
+  are dropped when a Cell changes its kind and never when Soldiers or
+  Packages move. A field is as long as the Graph, the Grid for a
+  GridGraph, so by default no more are kept than fit in default_cells.
+"""
+class FlowFields:
+  default_capacity = 32
+  default_cells = 8000000
+  unreachable = -1
+
+  """
+    - builds is Integer, fields computed so far
+    - capacity is Integer
+    - fields is OrderedDict<(Integer, Integer), array<int>>, distances indexed by Node id
+    - graph is Graph
+    - hits is Integer
+    - log is Logger
+    - totals is SearchStats, the breadth first searches of every field built
+  """
+  def __init__(self, graph, capacity=None):
+    if capacity == None:
+      capacity = min(FlowFields.default_capacity, max(1, FlowFields.default_cells // max(1, graph.size)))
+    self._log = Logger()
+    self._builds = 0
+    self._capacity = capacity
+    self._fields = OrderedDict()
+    self._graph = graph
+    self._hits = 0
+    self._totals = SearchStats()
+    self._log.debug("FlowFields", "Init Object -- capacity of {} fields".format(capacity))
+
+  @property
+  def builds(self):
+    return self._builds
+
+  @property
+  def hits(self):
+    return self._hits
+
+  @property
+  def size(self):
+    return len(self._fields)
+
+  @property
+  def totals(self):
+    return self._totals.copy()
+
+  def cellChanged(self, cell):
+    self._fields.clear()
+
+  def distance(self, cell, target):
+    node = self._graph.idOf(cell)
+    if node == None:
+      return None
+
+    field = self.fieldTo(target)
+    if field == None or field[node] == FlowFields.unreachable:
+      return None
+    return field[node]
+
+  """
+    Distances to the target indexed by Node id, unreachable Nodes hold
+    FlowFields.unreachable, or None when the target is not on the Graph
+  """
+  def fieldTo(self, target):
+    key = (target.point.x, target.point.y)
+    field = self._fields.get(key)
+    if not field == None:
+      self._hits += 1
+      self._fields.move_to_end(key)
+      return field
+
+    destination = self._graph.idOf(target)
+    if destination == None:
+      return None
+
+    if self._capacity <= 0:
+      return self._build(destination)
+
+    while len(self._fields) >= self._capacity:
+      self._fields.popitem(last=False)
+
+    field = self._build(destination)
+    self._fields[key] = field
+    return field
+
+  def occupantChanged(self, cell, previous):
+    pass
+
+  def regionChanged(self, kind, top, bottom, left, right):
+    self._fields.clear()
+
+  """
+    The Cells from the start to the target, both included, read from the
+    field of the target, or None when the target can not be reached
+  """
+  def route(self, start, target):
+    node = self._graph.idOf(start)
+    field = self.fieldTo(target)
+    if node == None or field == None or field[node] == FlowFields.unreachable:
+      return None
+
+    result = [start]
+    while field[node] > 0:
+      node = self._downhill(field, node)
+      result.append(self._graph.cellOf(node))
+    return result
+
+  """
+    The neighbour of the cell one step closer to the target, an empty one
+    when there is a choice, or None when the cell is the target or the
+    target can not be reached
+  """
+  def stepFrom(self, cell, target):
+    node = self._graph.idOf(cell)
+    field = self.fieldTo(target)
+    if node == None or field == None or field[node] <= 0:
+      return None
+    return self._graph.cellOf(self._downhill(field, node))
+
+  def _build(self, destination):
+    began = perf_counter()
+    expanded = 0
+    edge_lookups = 0
+    field = array("i", [FlowFields.unreachable]) * self._graph.size
+    field[destination] = 0
+    queue = deque([destination])
+    while len(queue) > 0:
+      current = queue.popleft()
+      expanded += 1
+      distance = field[current] + 1
+      for node in self._graph.neighboursOf(current):
+        edge_lookups += 1
+        if field[node] == FlowFields.unreachable:
+          field[node] = distance
+          queue.append(node)
+
+    self._builds += 1
+    self._totals.add(SearchStats(1, expanded, expanded, 0, edge_lookups, 0, perf_counter() - began))
+    return field
+
+  def _downhill(self, field, node):
+    result = None
+    for other in self._graph.neighboursOf(node):
+      if field[other] == field[node] - 1:
+        if self._graph.cellOf(other).isEmpty():
+          return other
+        if result == None:
+          result = other
+    return result
+
+  def __str__(self):
+    return "{} of {} fields -- {} hits -- {} builds".format(
+      self.size,
+      self._capacity,
+      self._hits,
+      self._builds
+    )
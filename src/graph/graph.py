@@ -1,6 +1,10 @@
+from array import array
 from enum import Enum
+from time import perf_counter
 
+from src.heuristic.heuristic import ManhattanHeuristic
 from src.logger.logger import Logger
+from src.stats.stats import SearchStats
 
 class NodeState(Enum):
   START = 0
@@ -10,59 +14,36 @@ class NodeState(Enum):
   WHITE = 4
 
 class Node:
-  infinite_manhattan = 100000
   
   """
     - ajacent is List<Node>
     - cell is Cell
-    - manhattan is Number
-    - parent is Node
-    - state is NodeState
+    - id is Integer, position of the Node in its Graph
   """
   def __init__(self, cell):
     self.cell = cell
     self._adjacent = []
-    self._parent = None
-    self._manhattan = None
-    self.resetParent()
-    self.resetManhattan()
-    self.resetState()
+    self._id = None
 
   @property
   def cell(self):
     return self._cell
 
   @property
-  def manhattan(self):
-    return self._manhattan
+  def id(self):
+    return self._id
   
   @property
   def neighbours(self):
     return self._adjacent
-  
-  @property
-  def parent(self):
-    return self._parent
-
-  @property
-  def state(self):
-    return self._state
 
   @cell.setter
   def cell(self, val):
     self._cell = val
 
-  @manhattan.setter
-  def manhattan(self, val):
-    self._manhattan = val
-
-  @parent.setter
-  def parent(self, val):
-    self._parent = val
-
-  @state.setter
-  def state(self, val):
-    self._state = val
+  @id.setter
+  def id(self, val):
+    self._id = val
 
   def addNeighbour(self, other):
     if other in self._adjacent:
@@ -72,22 +53,13 @@ class Node:
   def isNeighbour(self, other):
     return other in self._adjacent
 
-  def resetManhattan(self):
-    self._manhattan = Node.infinite_manhattan
-
-  def resetParent(self):
-    self._parent = None
-
-  def resetState(self):
-    self._state = NodeState.WHITE
-
   def __eq__(self, other):
     if isinstance(other, Node):
       return self.cell.point == other.cell.point
     return False
 
-  def __hash__(self, other):
-    return hash(self.cell.point) + hash(self.cell.point)
+  def __hash__(self):
+    return hash(self.cell.point)
 
 class Edge:
 
@@ -128,49 +100,520 @@ class Edge:
   def __str__(self):
     return "{} -> {}".format(str(self.src.cell.point), str(self.dst.cell.point))
 
+class Graph:
+  none = -1
+
+  """
+    Read only once built, shared by every search running on it.
+    Nodes are numbered 0 to size - 1 and the arcs leaving the Node i are
+    the positions offsets[i] to offsets[i + 1] of targets and costs, so the
+    searches work on integer ids and flat arrays only. The Nodes it is
+    built from are read once and not kept, Nodes are made only at the API,
+    as views, like the ones of a GridGraph. The Cells are read from the
+    Grid when one is given, otherwise the Cells of the Nodes are kept.
+    - cells is List<Cell>, by id, None when the Cells are read from the Grid
+    - costs is array<int> or array<float>, cost of every arc
+    - grid is Grid, None when the Cells are kept
+    - index is List<array<int>>, Node ids dense by x and y, Graph.none where no Node
+    - offsets is array<int>, first arc of every Node and the end of the last one
+    - targets is array<int>, the id every arc leads to
+    - uniform is Boolean, True when every arc costs 1
+    - xs is array<int>, x of every Node by id
+    - ys is array<int>, y of every Node by id
+  """
+  def __init__(self, nodes, edges=None, grid=None):
+    self._log = Logger()
+    self._cells = None
+    self._costs = None
+    self._grid = grid
+    self._index = None
+    self._offsets = None
+    self._targets = None
+    self._uniform = True
+    self._xs = None
+    self._ys = None
+    self._indexNodes(nodes)
+    self._indexArcs(nodes, edges)
+
+  @property
+  def size(self):
+    return len(self._xs)
+
+  @property
+  def uniform(self):
+    return self._uniform
+
+  """
+    (id, cost) of every arc leaving the Node with the given id
+  """
+  def arcsOf(self, node_id):
+    first = self._offsets[node_id]
+    last = self._offsets[node_id + 1]
+    return zip(self._targets[first:last], self._costs[first:last])
+
+  def cellOf(self, node_id):
+    if self._grid == None:
+      return self._cells[node_id]
+    return self._grid.cellAt(self._xs[node_id], self._ys[node_id])
+
+  def coordinatesOf(self, node_id):
+    return (self._xs[node_id], self._ys[node_id])
+
+  """
+    Cost of the arc between the two ids, or None when they are not neighbours
+  """
+  def costBetween(self, node_id, other):
+    for neighbour, cost in self.arcsOf(node_id):
+      if neighbour == other:
+        return cost
+    return None
+
+  def ids(self):
+    return range(len(self._xs))
+
+  def idsOf(self, kinds):
+    return [node_id for node_id in self.ids() if self.kindOf(node_id) in kinds]
+
+  def idAt(self, x, y):
+    if x < 0 or x >= len(self._index):
+      return None
+    column = self._index[x]
+    if y < 0 or y >= len(column) or column[y] == Graph.none:
+      return None
+    return column[y]
+
+  def idOf(self, cell):
+    return self.idAt(cell.point.x, cell.point.y)
+
+  def kindOf(self, node_id):
+    if self._grid == None:
+      return self._cells[node_id].kind
+    return self._grid.kindAt(self._xs[node_id], self._ys[node_id])
+
+  def neighboursOf(self, node_id):
+    return self._targets[self._offsets[node_id]:self._offsets[node_id + 1]]
+
+  def nodeAt(self, x, y):
+    node_id = self.idAt(x, y)
+    if node_id == None:
+      return None
+    return GraphNode(self, node_id)
+
+  def nodeBy(self, cell):
+    return self.nodeAt(cell.point.x, cell.point.y)
+
+  def nodeByCoordinate(self, coord):
+    return self.nodeAt(coord.x, coord.y)
+
+  def nodeOf(self, node_id):
+    return GraphNode(self, node_id)
+
+  """
+    The arcs follow the neighbours of every Node that are on the Graph too,
+    each costs the Edge between the two Cells, 1 when no Edges are given
+  """
+  def _indexArcs(self, nodes, edges):
+    prices = dict()
+    if not edges == None:
+      for edge in edges:
+        src = edge.src.cell.point
+        dst = edge.dst.cell.point
+        prices.setdefault((src.x, src.y, dst.x, dst.y), edge.cost)
+        prices.setdefault((dst.x, dst.y, src.x, src.y), edge.cost)
+
+    offsets = array("i", [0])
+    targets = array("i")
+    costs = []
+    for node in nodes:
+      point = node.cell.point
+      for other in node.neighbours:
+        neighbour = self.idOf(other.cell)
+        if neighbour == None:
+          continue
+
+        cost = 1
+        if not edges == None:
+          cost = prices.get((point.x, point.y, other.cell.point.x, other.cell.point.y))
+          if cost == None:
+            self._log.info("Graph", "EXPECTED AN EDGE, BUT NONE WAS FOUND")
+            exit(1)
+        if not cost == 1:
+          self._uniform = False
+        targets.append(neighbour)
+        costs.append(cost)
+      offsets.append(len(targets))
+
+    kind = "i"
+    if not all(isinstance(cost, int) for cost in costs):
+      kind = "d"
+    self._costs = array(kind, costs)
+    self._offsets = offsets
+    self._targets = targets
+
+  def _indexNodes(self, nodes):
+    width = 0
+    height = 0
+    for node in nodes:
+      width = max(width, node.cell.point.x + 1)
+      height = max(height, node.cell.point.y + 1)
+
+    self._index = [array("i", [Graph.none]) * height for _ in range(width)]
+    self._xs = array("i", [0]) * len(nodes)
+    self._ys = array("i", [0]) * len(nodes)
+    if self._grid == None:
+      self._cells = [node.cell for node in nodes]
+    for i, node in enumerate(nodes):
+      self._index[node.cell.point.x][node.cell.point.y] = i
+      self._xs[i] = node.cell.point.x
+      self._ys[i] = node.cell.point.y
+
+"""
+  Graph of the Cells of a Grid that are of the given kinds, with nothing
+  stored per Node or per Edge. The id of the Cell (x; y) is x * width + y,
+  the neighbours of an id are read from the kinds in the Grid when they are
+  asked for and every step costs 1. Nodes are made only at the API, as
+  views. Same API as Graph, for the Maps whose Graph would not fit.
+"""
+class GridGraph:
+
+  """
+    - grid is Grid
+    - kinds is Set<CellType>, the kinds of the Cells on the Graph
+    - width is Integer
+  """
+  def __init__(self, grid, kinds):
+    self._grid = grid
+    self._kinds = set(kinds)
+    self._width = grid.width
+
+  @property
+  def size(self):
+    return self._grid.height * self._width
+
+  @property
+  def uniform(self):
+    return True
+
+  def arcsOf(self, node_id):
+    return [(other, 1) for other in self.neighboursOf(node_id)]
+
+  def cellOf(self, node_id):
+    return self._grid.cellAt(node_id // self._width, node_id % self._width)
+
+  def coordinatesOf(self, node_id):
+    return divmod(node_id, self._width)
+
+  def costBetween(self, node_id, other):
+    if other in self.neighboursOf(node_id):
+      return 1
+    return None
+
+  def idAt(self, x, y):
+    if not self._contains(x, y):
+      return None
+    return x * self._width + y
+
+  def idOf(self, cell):
+    return self.idAt(cell.point.x, cell.point.y)
+
+  def ids(self):
+    return self.idsOf(self._kinds)
+
+  def idsOf(self, kinds):
+    kinds = [kind for kind in kinds if kind in self._kinds]
+    return [x * self._width + y for x, y in self._grid.pointsOf(kinds)]
+
+  def kindOf(self, node_id):
+    return self._grid.kindAt(node_id // self._width, node_id % self._width)
+
+  """
+    Ids of the neighbours of the Graph, above, left, right and below
+  """
+  def neighboursOf(self, node_id):
+    width = self._width
+    x, y = divmod(node_id, width)
+    kindAt = self._grid.kindAt
+    kinds = self._kinds
+    result = []
+    if x > 0 and kindAt(x - 1, y) in kinds:
+      result.append(node_id - width)
+    if y > 0 and kindAt(x, y - 1) in kinds:
+      result.append(node_id - 1)
+    if y + 1 < width and kindAt(x, y + 1) in kinds:
+      result.append(node_id + 1)
+    if x + 1 < self._grid.height and kindAt(x + 1, y) in kinds:
+      result.append(node_id + width)
+    return result
+
+  def nodeAt(self, x, y):
+    node_id = self.idAt(x, y)
+    if node_id == None:
+      return None
+    return GraphNode(self, node_id)
+
+  def nodeBy(self, cell):
+    return self.nodeAt(cell.point.x, cell.point.y)
+
+  def nodeByCoordinate(self, coord):
+    return self.nodeAt(coord.x, coord.y)
+
+  def nodeOf(self, node_id):
+    return GraphNode(self, node_id)
+
+  def _contains(self, x, y):
+    if x < 0 or x >= self._grid.height or y < 0 or y >= self._width:
+      return False
+    return self._grid.kindAt(x, y) in self._kinds
+
+"""
+  Node of a Graph or a GridGraph, made when asked for, whose neighbours are
+  read from the Graph
+"""
+class GraphNode(Node):
+
+  """
+    - graph is Graph or GridGraph
+  """
+  def __init__(self, graph, node_id):
+    self._graph = graph
+    self._id = node_id
+    self.cell = graph.cellOf(node_id)
+
+  @property
+  def neighbours(self):
+    return [self._graph.nodeOf(other) for other in self._graph.neighboursOf(self._id)]
+
+  """
+    The neighbours are read from the Graph, none are added
+  """
+  def addNeighbour(self, other):
+    pass
+
+  def isNeighbour(self, other):
+    return not self._graph.costBetween(self._id, other.id) == None
+
+"""
+  Values by Node id of the ids written since the last clear, the others
+  read as the default. Holds the state of a search on a GridGraph, where
+  arrays as long as the Grid would be mostly walls and unvisited Cells.
+"""
+class SparseArray(dict):
+
+  """
+    - default is Object
+  """
+  def __init__(self, default):
+    super().__init__()
+    self._default = default
+
+  def __missing__(self, key):
+    return self._default
+
 class PriorityNodes:
 
+  """
+    Indexed binary min-heap, every operation is O(log n)
+    - entries is List<[priority, order, node]>
+    - order is Integer, breaks ties in insertion order
+    - positions is Dictionary<Node, Integer>
+  """
   def __init__(self):
     self._entries = []
+    self._order = 0
+    self._positions = dict()
+
+  @property
+  def size(self):
+    return len(self._entries)
+
+  def contains(self, node):
+    return node in self._positions
+
+  def decrease(self, node, priority):
+    index = self._positions[node]
+    entry = self._entries[index]
+    if priority < entry[0]:
+      entry[0] = priority
+      self._siftUp(index)
 
   def empty(self):
     return len(self._entries) == 0
 
-  def insert(self, node):
-    self._entries.append(node)
+  def insert(self, node, priority):
+    if node in self._positions:
+      self.update(node, priority)
+      return
+    
+    self._entries.append([priority, self._order, node])
+    self._order += 1
+    self._positions[node] = len(self._entries) - 1
+    self._siftUp(len(self._entries) - 1)
 
   def pop(self):
-    self._entries.sort(key=lambda node: node.manhattan, reverse=True)
-    removed = self._entries.pop()
-    return removed
+    if self.empty():
+      return None
+    
+    last = self._entries.pop()
+    if self.empty():
+      del self._positions[last[2]]
+      return last[2]
+    
+    removed = self._entries[0]
+    self._entries[0] = last
+    self._positions[last[2]] = 0
+    del self._positions[removed[2]]
+    self._siftDown(0)
+    return removed[2]
+
+  def remove(self, node):
+    index = self._positions.pop(node)
+    last = self._entries.pop()
+    if index == len(self._entries):
+      return
+
+    self._entries[index] = last
+    self._positions[last[2]] = index
+    self._siftUp(index)
+    self._siftDown(self._positions[last[2]])
+
+  def topPriority(self):
+    if self.empty():
+      return None
+    return self._entries[0][0]
+
+  def update(self, node, priority):
+    index = self._positions[node]
+    entry = self._entries[index]
+    previous = entry[0]
+    entry[0] = priority
+    if priority < previous:
+      self._siftUp(index)
+    else:
+      self._siftDown(index)
+
+  def _less(self, i, j):
+    first = self._entries[i]
+    second = self._entries[j]
+    if first[0] == second[0]:
+      return first[1] < second[1]
+    return first[0] < second[0]
+
+  def _siftDown(self, index):
+    size = len(self._entries)
+    while True:
+      smallest = index
+      left = 2 * index + 1
+      right = left + 1
+      if left < size and self._less(left, smallest):
+        smallest = left
+      if right < size and self._less(right, smallest):
+        smallest = right
+      if smallest == index:
+        return
+      self._swap(index, smallest)
+      index = smallest
+
+  def _siftUp(self, index):
+    while index > 0:
+      parent = (index - 1) // 2
+      if not self._less(index, parent):
+        return
+      self._swap(index, parent)
+      index = parent
+
+  def _swap(self, i, j):
+    entries = self._entries
+    entries[i], entries[j] = entries[j], entries[i]
+    self._positions[entries[i][2]] = i
+    self._positions[entries[j][2]] = j
 
 class Astar():
+  infinite_cost = float("inf")
 
   """
-    - edges is List<Edge>
-    - last_analyzed is Boolean
+    Holds only the state of its own search, the Graph is shared.
+    The search runs on the integer ids of the Graph, the per search state
+    of a Node (state, cost, estimate, parent) lives in flat arrays indexed
+    by id and is valid only while its stamp equals the current generation,
+    so a reset is a single increment of the generation. The arrays are made
+    on the first search, an Astar that never searches costs nothing. On a
+    GridGraph they are SparseArrays emptied at every reset instead, so a
+    search holds only the Nodes it touched.
+    Ties on the estimate go to the Node with the larger cost, the one
+    closer to the target. Nodes are only made at the API, for the Soldiers.
+    A search can also be run a few expansions at a time with resume, the
+    path to the closest Node found so far stands in until it is over.
+
+    - closest is Integer, id of the expanded Node of the least heuristic
+    - costs is List<Number>, g, the cost of the best way found from the start
+    - edge_lookups is Integer, arcs followed by the current search
+    - estimates is List<Number>, f, the cost plus the heuristic to the target
+    - expanded is Integer, Nodes expanded by the current search
+    - generation is Integer
+    - graph is Graph
+    - heap_operations is Integer, open list operations of the current search
+    - heuristic is ManhattanHeuristic, OctileHeuristic or ZeroHeuristic
+    - last_analyzed is Integer, id of the Node expanded last
     - log is Logger
-    - nodes is List<Node>
-    - pq is PriorityNodes
+    - parents is array<int>, Graph.none for the start
+    - path_length is Integer, Nodes on the path found by the current search
+    - pq is PriorityNodes of ids
+    - pushed is Integer, Nodes pushed by the current search
     - solved is Boolean
-    - start is Node
-    - target is Node
+    - stamps is array<int>
+    - start is Integer, id of the start
+    - states is bytearray, NodeState values
+    - target is Integer, id of the target
+    - time is Number, seconds spent on the current search
+    - totals is SearchStats, the searches finished before the current one
   """
-  def __init__(self, nodes, edges):
+  def __init__(self, graph, heuristic=None):
+    if heuristic == None:
+      heuristic = ManhattanHeuristic()
     self._log = Logger()
-    self._nodes = nodes
-    self._edges = edges
+    self._graph = graph
+    self._closest = None
+    self._costs = None
+    self._edge_lookups = 0
+    self._estimates = None
+    self._expanded = 0
+    self._generation = 0
+    self._heap_operations = 0
+    self._heuristic = heuristic
     self._last_analyzed = None
+    self._parents = None
+    self._path_length = 0
+    self._pushed = 0
+    self._stamps = None
+    self._states = None
     self._solved = False
     self._start = None
     self._target = None
+    self._time = 0
+    self._totals = SearchStats()
     self._pq = None
     self.resetAlgorithm()
-    self._log.debug("Astar", "Init Object -- {} Nodes -- {} Edges".format(len(nodes), len(edges)))
+    self._log.debug("Astar", "Init Object -- {} Nodes".format(graph.size))
+
+  @property
+  def closest(self):
+    return self._nodeOf(self._closest)
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def graph(self):
+    return self._graph
+
+  @property
+  def heuristic(self):
+    return self._heuristic
 
   @property
   def last_analyzed(self):
-    return self._last_analyzed
+    return self._nodeOf(self._last_analyzed)
 
   @property
   def solved(self):
@@ -178,98 +621,61 @@ class Astar():
 
   @property
   def start(self):
-    return self._start
+    return self._nodeOf(self._start)
 
+  """
+    Counters of the current search, or of the last one until another starts
+  """
   @property
-  def target(self):
-    return self._target
+  def stats(self):
+    searched = 0
+    if self._expanded > 0 or self._pushed > 0:
+      searched = 1
+    return SearchStats(
+      searched,
+      self._expanded,
+      self._pushed,
+      self._heap_operations,
+      self._edge_lookups,
+      self._path_length,
+      self._time
+    )
 
-  def nextIteration(self):
-    current = self._pq.pop()
-    self._last_analyzed = current
-    
-    if current.state == NodeState.TARGET:
-      self._solved = True
-      return
-    
-    if not current.state == NodeState.START:
-      current.state = NodeState.BLACK
-    
-    for node in current.neighbours:
-      if node.state == NodeState.BLACK:
-        continue
+  @property
+  def target(self):
+    return self._nodeOf(self._target)
 
-      edge = self._edgeBy(current, node)
+  """
+    Counters summed over every search since the Astar was created
+  """
+  @property
+  def totals(self):
+    result = self._totals.copy()
+    result.add(self.stats)
+    return result
 
-      if edge == None:
-        self._log.info("Astar", "EXPECTED AN EDGE, BUT NONE WAS RETURNED")
-        exit(1)
+  def costOf(self, node):
+    if self._stamps == None:
+      return Astar.infinite_cost
+    return self._costOf(node.id)
 
-      left_to_target = self._target.cell.point.distance(node.cell.point)
-      manhattan_value = current.manhattan + left_to_target + edge.cost
+  def estimateOf(self, node):
+    if self._stamps == None or not self._stamps[node.id] == self._generation:
+      return Astar.infinite_cost
+    return self._estimates[node.id]
 
-      if node.state == NodeState.WHITE or node.state == NodeState.TARGET:
-        node.manhattan = manhattan_value
-        node.parent = current
-        node.state = NodeState.GRAY
-        self._emplace(node.cell.point)  
-      
-      elif node.state == NodeState.GRAY or node.state == NodeState.TARGET:
-        if node.manhattan > manhattan_value:
-          node.manhattan = manhattan_value
-          node.parent = current
+  def nodeBy(self, cell):
+    return self._graph.nodeBy(cell)
 
-      if self._target == node:
-        self._solved = True
-        return
+  def nextIteration(self):
+    began = perf_counter()
+    self._iterate()
+    self._time += perf_counter() - began
 
   def nextIterationNeighbourPriority(self):
-    current = self._pq.pop()
-    if not self._last_analyzed == None:
-      is_neighbour = current.isNeighbour(self._last_analyzed)
-      if not is_neighbour or not self._last_analyzed.isNeighbour(current):
-        return
-    
-    if current == None:
-      self._target = None
-      return
-    
-    self._last_analyzed = current
-    
-    if current.state == NodeState.TARGET:
-      self._solved = True
-      return
-    
-    if not current.state == NodeState.START:
-      current.state = NodeState.BLACK
-    
-    for node in current.neighbours:
-      if node.state == NodeState.BLACK:
-        continue
-
-      edge = self._edgeBy(current, node)
-
-      if edge == None:
-        self._log.info("Astar", "EXPECTED AN EDGE, BUT NONE WAS RETURNED")
-        exit(1)
-
-      left_to_target = self._target.cell.point.distance(node.cell.point)
-      manhattan_value = current.manhattan + left_to_target + edge.cost
-
-      if node.state == NodeState.WHITE or node.state == NodeState.TARGET:
-        node.manhattan = manhattan_value
-        node.parent = current
-        node.state = NodeState.GRAY
-        self._emplace(node.cell.point)  
-      
-      elif node.state == NodeState.GRAY or node.state == NodeState.TARGET:
-        if node.manhattan > manhattan_value:
-          node.manhattan = manhattan_value
-          node.parent = current
-
-      if self._target == node:
-        self._solved = True
-        return
+    began = perf_counter()
+    self._iterateNeighbourPriority()
+    self._time += perf_counter() - began
 
   def noOptionsLeft(self):
     if not self._target == None:
@@ -279,16 +685,50 @@ class Astar():
   def noSolution(self):
     return self._pq.empty()
 
-  def resetLastAnalysed(self):
-    self._last_analyzed = None
+  def parentOf(self, node):
+    if self._stamps == None:
+      return None
+    parent = self._parentOf(node.id)
+    if parent == Graph.none:
+      return None
+    return self._graph.nodeOf(parent)
+
+  def path(self):
+    return [self._graph.nodeOf(node) for node in self._pathIds()]
 
-  def resetManhattan(self):
-    for node in self._nodes:
-      node.resetManhattan()
+  """
+    Nodes of the search tree from the cell to the node, up to their common
+    ancestor and down again, or an empty list when the cell is not on the
+    tree of the current search
+  """
+  def pathBetween(self, cell, node):
+    if self._stamps == None or node == None:
+      return []
+    
+    up = dict()
+    current = self._graph.idOf(cell)
+    last = current
+    while not current == None and not current == Graph.none:
+      up[current] = len(up)
+      last = current
+      current = self._parentOf(current)
+    if not last == self._start:
+      return []
+    
+    down = []
+    current = node.id
+    while not current in up:
+      if current == Graph.none:
+        return []
+      down.append(current)
+      current = self._parentOf(current)
+    
+    result = list(up)[:up[current] + 1]
+    down.reverse()
+    return [self._graph.nodeOf(other) for other in result + down]
 
-  def resetParents(self):
-    for node in self._nodes:
-      node.resetParent()
+  def resetLastAnalysed(self):
+    self._last_analyzed = None
 
   def resetPriorityQueue(self):
     self._pq = PriorityNodes()
@@ -299,57 +739,380 @@ class Astar():
   def resetStart(self):
     self._start = None
   
-  def resetStates(self):
-    for node in self._nodes:
-      node.resetState()
+  def resetSearch(self):
+    self._finishSearch()
+    self._closest = None
+    self._generation += 1
+    if isinstance(self._stamps, SparseArray):
+      for values in (self._costs, self._estimates, self._parents, self._stamps, self._states):
+        values.clear()
 
   def resetTarget(self):
     self._target = None
 
   def resetAlgorithm(self):
     self.resetSolved()
-    self.resetStates()
-    self.resetManhattan()
+    self.resetSearch()
     self.resetPriorityQueue()
-    self.resetParents()
     self.resetStart()
     self.resetTarget()
     self.resetLastAnalysed()
 
+  """
+    Runs the search for at most limit expansions, it goes on from there at
+    the next call until it is reset. True once it is over, solved or not.
+  """
+  def resume(self, limit):
+    began = perf_counter()
+    last = self._expanded + limit
+    while not self._solved and not self.noSolution() and self._expanded < last:
+      self._iterate()
+      self._keepClosest()
+    self._time += perf_counter() - began
+    return self._solved or self.noSolution()
+
+  def solve(self, start, target):
+    self.resetAlgorithm()
+    self.updateNodeToStateStartBy(start)
+    self.updateNodeToStateTargetBy(target)
+
+    began = perf_counter()
+    while not self._solved and not self.noSolution():
+      self._iterate()
+    self._time += perf_counter() - began
+
+    if not self._solved:
+      return []
+    return self.path()
+
+  def stateOf(self, node):
+    if self._stamps == None:
+      return NodeState.WHITE
+    return NodeState(self._stateOf(node.id))
+
+  """
+    The start is queued with its estimate once the target is known, the
+    order the Soldiers call the two updates in does not matter
+  """
   def updateNodeToStateStartBy(self, cell):
-    self._updateStateOf(cell.point, NodeState.START)
-    self._updateManhattanOf(cell.point, 0)
-    self._emplace(cell.point)
-    self._start = self._nodeByCoordinate(cell.point)
+    self._allocate()
+    self._start = self._graph.idOf(cell)
+    self._touch(self._start)
+    self._states[self._start] = NodeState.START.value
+    self._costs[self._start] = 0
+    self._queueStart()
 
   def updateNodeToStateTargetBy(self, cell):
-    self._updateStateOf(cell.point, NodeState.TARGET)
-    self._target = self._nodeByCoordinate(cell.point)
-
-  def _edgeBy(self, node, neighbour):
-    for edge in self._edges:
-      if edge.src.cell.point == node.cell.point and edge.dst.cell.point == neighbour.cell.point:
-        # self._log.debug("Astar", "Returning the edge {}".format(str(edge)))
-        return edge
-      if edge.dst.cell.point == node.cell.point and edge.src.cell.point == neighbour.cell.point:
-        # self._log.debug("Astar", "Returning the edge {}".format(str(edge)))
-        return edge
-    return None
-  
-  def _emplace(self, coord):
-    node = self._nodeByCoordinate(coord)
-    self._pq.insert(node)
-  
-  def _nodeByCoordinate(self, coord):
-    for node in self._nodes:
-      if node.cell.point == coord:
-        return node
-    return None
+    self._allocate()
+    self._target = self._graph.idOf(cell)
+    self._touch(self._target)
+    self._states[self._target] = NodeState.TARGET.value
+    self._queueStart()
 
-  def _updateManhattanOf(self, coord, val):
-    current = self._nodeByCoordinate(coord)
-    current.manhattan = val
-  
-  def _updateStateOf(self, coord, val):
-    node = self._nodeByCoordinate(coord)
-    node.state = val
\ No newline at end of file
+  def _allocate(self):
+    if not self._stamps == None:
+      return
+    if isinstance(self._graph, GridGraph):
+      self._costs = SparseArray(Astar.infinite_cost)
+      self._estimates = SparseArray(Astar.infinite_cost)
+      self._parents = SparseArray(Graph.none)
+      self._stamps = SparseArray(0)
+      self._states = SparseArray(NodeState.WHITE.value)
+      return
+    size = self._graph.size
+    self._costs = [Astar.infinite_cost] * size
+    self._estimates = [Astar.infinite_cost] * size
+    self._parents = array("i", [Graph.none]) * size
+    self._stamps = array("L", [0]) * size
+    self._states = bytearray([NodeState.WHITE.value]) * size
+
+  def _costOf(self, node):
+    if self._stamps[node] == self._generation:
+      return self._costs[node]
+    return Astar.infinite_cost
+
+  def _emplace(self, node):
+    self._pushed += 1
+    self._heap_operations += 1
+    self._pq.insert(node, (self._estimates[node], -self._costs[node]))
+
+  def _estimate(self, node):
+    return self._heuristic.estimate(self._graph.coordinatesOf(node), self._graph.coordinatesOf(self._target))
+
+  def _expand(self, current):
+    self._expanded += 1
+    current_state = self._stateOf(current)
+    
+    if current_state == NodeState.TARGET.value:
+      self._markSolved()
+      return
+    
+    if not current_state == NodeState.START.value:
+      self._touch(current)
+      self._states[current] = NodeState.BLACK.value
+    
+    black = NodeState.BLACK.value
+    gray = NodeState.GRAY.value
+    fresh = (NodeState.WHITE.value, NodeState.TARGET.value)
+    current_cost = self._costs[current]
+    for node, edge_cost in self._graph.arcsOf(current):
+      self._edge_lookups += 1
+      state = self._stateOf(node)
+      if state == black:
+        continue
+
+      cost = current_cost + edge_cost
+
+      if state in fresh:
+        self._touch(node)
+        self._costs[node] = cost
+        self._estimates[node] = cost + self._estimate(node)
+        self._parents[node] = current
+        self._states[node] = gray
+        self._emplace(node)
+      
+      elif state == gray:
+        if self._costs[node] > cost:
+          self._costs[node] = cost
+          self._estimates[node] = cost + self._estimate(node)
+          self._parents[node] = current
+          if self._pq.contains(node):
+            self._heap_operations += 1
+            self._pq.decrease(node, (self._estimates[node], -cost))
+          else:
+            self._emplace(node)
+
+      if self._target == node:
+        self._markSolved()
+        return
+
+  """
+    Adds the counters of the current search to the totals and clears them
+  """
+  def _finishSearch(self):
+    self._totals.add(self.stats)
+    self._edge_lookups = 0
+    self._expanded = 0
+    self._heap_operations = 0
+    self._path_length = 0
+    self._pushed = 0
+    self._time = 0
+
+  def _heuristicOf(self, node):
+    return self._estimates[node] - self._costs[node]
+
+  def _iterate(self):
+    current = self._pq.pop()
+    self._heap_operations += 1
+    self._last_analyzed = current
+    self._expand(current)
+
+  def _iterateNeighbourPriority(self):
+    current = self._pq.pop()
+    self._heap_operations += 1
+    if current == None:
+      self._target = None
+      return
+
+    if not self._last_analyzed == None:
+      if self._graph.costBetween(current, self._last_analyzed) == None:
+        return
+    
+    self._last_analyzed = current
+    self._expand(current)
+
+  def _keepClosest(self):
+    node = self._last_analyzed
+    if node == None or node == self._closest:
+      return
+    if self._closest == None or self._heuristicOf(node) < self._heuristicOf(self._closest):
+      self._closest = node
+
+  def _markSolved(self):
+    self._solved = True
+    self._path_length = len(self.path())
+
+  def _nodeOf(self, node):
+    if node == None:
+      return None
+    return self._graph.nodeOf(node)
+
+  def _parentOf(self, node):
+    if self._stamps[node] == self._generation:
+      return self._parents[node]
+    return Graph.none
+
+  def _pathIds(self):
+    result = []
+    node = self._target
+    while not node == None and not node == Graph.none:
+      result.append(node)
+      node = self._parentOf(node)
+    result.reverse()
+    return result
+
+  def _queueStart(self):
+    if self._start == None or self._target == None:
+      return
+    self._estimates[self._start] = self._estimate(self._start)
+    self._emplace(self._start)
+
+  def _stateOf(self, node):
+    if self._stamps[node] == self._generation:
+      return self._states[node]
+    return NodeState.WHITE.value
+
+  def _touch(self, node):
+    if not self._stamps[node] == self._generation:
+      self._stamps[node] = self._generation
+      self._states[node] = NodeState.WHITE.value
+      self._costs[node] = Astar.infinite_cost
+      self._estimates[node] = Astar.infinite_cost
+      self._parents[node] = Graph.none
+
+"""
+  Two A* searches, one from the start and one backward from the target,
+  each expanding in turn until the best meeting Node is proven shortest.
+  Both use the same heuristic, the Manhattan distance by default, and break
+  ties toward the Node farthest from their own end, so on open
+  ground each frontier runs straight at the other one.
+"""
+class BidirectionalAstar:
+
+  """
+    - edge_lookups is Integer, arcs followed by the last search
+    - expanded is Integer, Nodes expanded by the last search
+    - graph is Graph
+    - heuristic is ManhattanHeuristic, OctileHeuristic or ZeroHeuristic
+    - log is Logger
+    - pushed is Integer, Nodes pushed by the last search
+    - totals is SearchStats, every search so far
+  """
+  def __init__(self, graph, heuristic=None):
+    if heuristic == None:
+      heuristic = ManhattanHeuristic()
+    self._log = Logger()
+    self._graph = graph
+    self._edge_lookups = 0
+    self._expanded = 0
+    self._heuristic = heuristic
+    self._pushed = 0
+    self._totals = SearchStats()
+    self._log.debug("BidirectionalAstar", "Init Object -- {} Nodes".format(graph.size))
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def graph(self):
+    return self._graph
+
+  @property
+  def heuristic(self):
+    return self._heuristic
+
+  """
+    Counters summed over every search since the BidirectionalAstar was created
+  """
+  @property
+  def totals(self):
+    return self._totals.copy()
+
+  def nodeBy(self, cell):
+    return self._graph.nodeBy(cell)
+
+  """
+    Nodes from the start to the target, both included, or an empty list
+    when the target can not be reached
+  """
+  def solve(self, start, target):
+    began = perf_counter()
+    self._edge_lookups = 0
+    self._expanded = 0
+    self._pushed = 0
+    source = self._graph.idOf(start)
+    destination = self._graph.idOf(target)
+    if source == destination:
+      return self._record(began, [self._graph.nodeOf(source)])
+
+    forward = self._frontier(source, destination)
+    backward = self._frontier(destination, source)
+    best = Astar.infinite_cost
+    meeting = None
+
+    while not forward["pq"].empty() and not backward["pq"].empty():
+      if max(forward["pq"].topPriority()[0], backward["pq"].topPriority()[0]) >= best:
+        break
+
+      if forward["pq"].size <= backward["pq"].size:
+        expanding, other = forward, backward
+      else:
+        expanding, other = backward, forward
+
+      current = expanding["pq"].pop()
+      expanding["closed"].add(current)
+      self._expanded += 1
+
+      for node, cost in self._graph.arcsOf(current):
+        self._edge_lookups += 1
+        if node in expanding["closed"]:
+          continue
+
+        distance = expanding["g"][current] + cost
+        if distance < expanding["g"].get(node, Astar.infinite_cost):
+          expanding["g"][node] = distance
+          expanding["parents"][node] = current
+          estimate = distance + self._estimate(node, expanding["end"])
+          expanding["pq"].insert(node, (estimate, -distance))
+          self._pushed += 1
+
+          if node in other["g"] and distance + other["g"][node] < best:
+            best = distance + other["g"][node]
+            meeting = node
+
+    if meeting == None:
+      return self._record(began, [])
+
+    result = BidirectionalAstar._walk(forward["parents"], meeting)
+    result.reverse()
+    result.extend(BidirectionalAstar._walk(backward["parents"], meeting)[1:])
+    return self._record(began, [self._graph.nodeOf(node) for node in result])
+
+  def _estimate(self, node, other):
+    return self._heuristic.estimate(self._graph.coordinatesOf(node), self._graph.coordinatesOf(other))
+
+  def _frontier(self, begin, end):
+    pq = PriorityNodes()
+    pq.insert(begin, (self._estimate(begin, end), 0))
+    self._pushed += 1
+    return {
+      "closed": set(),
+      "end": end,
+      "g": {begin: 0},
+      "parents": {begin: None},
+      "pq": pq
+    }
+
+  """
+    Adds the last search to the totals and hands its path back
+  """
+  def _record(self, began, path):
+    self._totals.add(SearchStats(
+      1,
+      self._expanded,
+      self._pushed,
+      self._pushed + self._expanded,
+      self._edge_lookups,
+      len(path),
+      perf_counter() - began
+    ))
+    return path
+
+  @staticmethod
+  def _walk(parents, node):
+    result = []
+    while not node == None:
+      result.append(node)
+      node = parents[node]
+    return result
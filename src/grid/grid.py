@@ -0,0 +1,209 @@
+from array import array
+
+from src.cell.cell import Cell, CellType
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+"""
+  Array backed store of the Cells of a Maze. The kind of every Cell is an
+  uint8 and its occupant an int32 id, held in NumPy arrays when NumPy is
+  installed and in bytearray / array rows otherwise, so marking and
+  scanning whole regions does not touch a Python object per Cell.
+  Cell objects are created only when asked for, as views on the arrays
+  that are not kept, two views of the same Cell are equal.
+"""
+class Grid:
+  kinds = tuple(CellType)
+
+  """
+    - height is Integer
+    - kinds is numpy.ndarray<uint8> or List<bytearray>, indexed by x and y
+    - last is Integer, the last occupant id given
+    - objects is Dictionary<Integer, Object>, the occupant of every id, 0 is empty
+    - observers is List<Object> notified like the observers of a Cell, for
+      every Cell of the Grid changed through its view, and with
+      regionChanged(CellType, Integer, Integer, Integer, Integer) for every fill
+    - occupants is numpy.ndarray<int32> or List<array<int>>, indexed by x and y
+    - width is Integer
+  """
+  def __init__(self, height, width, kind=CellType.SPACE):
+    self._height = height
+    self._last = 0
+    self._objects = dict()
+    self._observers = []
+    self._width = width
+    if numpy == None:
+      self._kinds = [bytearray([kind.value]) * width for _ in range(height)]
+      self._occupants = [array("i", [0]) * width for _ in range(height)]
+    else:
+      self._kinds = numpy.full((height, width), kind.value, dtype=numpy.uint8)
+      self._occupants = numpy.zeros((height, width), dtype=numpy.int32)
+
+  @property
+  def height(self):
+    return self._height
+
+  @property
+  def width(self):
+    return self._width
+
+  def addObserver(self, observer):
+    self._observers.append(observer)
+
+  def border(self, kind):
+    last = self._height - 1
+    self.fill(kind, 0, 1, 0, self._width)
+    self.fill(kind, last, last + 1, 0, self._width)
+    self.fill(kind, 0, self._height, 0, 1)
+    self.fill(kind, 0, self._height, self._width - 1, self._width)
+
+  def cellAt(self, x, y):
+    return GridCell(self, x, y)
+
+  def cellChanged(self, cell):
+    for observer in self._observers:
+      observer.cellChanged(cell)
+
+  """
+    Marks every Cell with top <= x < bottom and left <= y < right, the
+    observers hear of the whole rectangle at once
+  """
+  def fill(self, kind, top, bottom, left, right):
+    if numpy == None:
+      for row in self._kinds[top:bottom]:
+        row[left:right] = bytearray([kind.value]) * (right - left)
+    else:
+      self._kinds[top:bottom, left:right] = kind.value
+    for observer in self._observers:
+      observer.regionChanged(kind, top, bottom, left, right)
+
+  def kindAt(self, x, y):
+    if numpy == None:
+      return Grid.kinds[self._kinds[x][y]]
+    return Grid.kinds[self._kinds.item(x, y)]
+
+  def markKind(self, x, y, kind):
+    if numpy == None:
+      self._kinds[x][y] = kind.value
+    else:
+      self._kinds[x, y] = kind.value
+
+  def markOccupant(self, x, y, obj):
+    previous = self._occupantIdAt(x, y)
+    if not previous == 0:
+      del self._objects[previous]
+
+    occupant = 0
+    if not obj == None:
+      self._last += 1
+      occupant = self._last
+      self._objects[occupant] = obj
+
+    if numpy == None:
+      self._occupants[x][y] = occupant
+    else:
+      self._occupants[x, y] = occupant
+
+  def occupantAt(self, x, y):
+    return self._objects.get(self._occupantIdAt(x, y))
+
+  def occupantChanged(self, cell, previous):
+    for observer in self._observers:
+      observer.occupantChanged(cell, previous)
+
+  """
+    The occupants of the Cells with top <= x < bottom and left <= y < right,
+    only of the Cells of the given kind when one is given
+  """
+  def occupantsIn(self, top, bottom, left, right, kind=None):
+    if numpy == None:
+      ids = []
+      for x in range(top, bottom):
+        for y in range(left, right):
+          occupant = self._occupants[x][y]
+          if not occupant == 0 and (kind == None or self._kinds[x][y] == kind.value):
+            ids.append(occupant)
+    else:
+      region = self._occupants[top:bottom, left:right]
+      mask = region > 0
+      if not kind == None:
+        mask &= self._kinds[top:bottom, left:right] == kind.value
+      ids = region[mask].tolist()
+    return [self._objects[occupant] for occupant in ids]
+
+  """
+    The (x, y) of every Cell of one of the given kinds, row by row
+  """
+  def pointsOf(self, kinds):
+    values = [kind.value for kind in kinds]
+    if numpy == None:
+      result = []
+      for x, row in enumerate(self._kinds):
+        for y, value in enumerate(row):
+          if value in values:
+            result.append((x, y))
+      return result
+    return [tuple(point) for point in numpy.argwhere(numpy.isin(self._kinds, values)).tolist()]
+
+  """
+    What the Cell shows on the Map, read from the arrays
+  """
+  def symbolAt(self, x, y):
+    occupant = self._occupantIdAt(x, y)
+    if not occupant == 0:
+      return str(self._objects[occupant])
+    return Cell.symbols.get(self.kindAt(x, y), " ")
+
+  def _occupantIdAt(self, x, y):
+    if numpy == None:
+      return self._occupants[x][y]
+    return self._occupants.item(x, y)
+
+"""
+  Cell whose kind and obj are read from and written to its Grid
+"""
+class GridCell(Cell):
+
+  """
+    - grid is Grid
+  """
+  def __init__(self, grid, x, y):
+    self._grid = grid
+    self._observers = None
+    self.point = (x, y)
+
+  @property
+  def kind(self):
+    return self._grid.kindAt(self._point.x, self._point.y)
+
+  @property
+  def obj(self):
+    return self._grid.occupantAt(self._point.x, self._point.y)
+
+  @kind.setter
+  def kind(self, val):
+    self._grid.markKind(self._point.x, self._point.y, val)
+    self._kindChanged()
+
+  @obj.setter
+  def obj(self, val):
+    previous = self.obj
+    self._grid.markOccupant(self._point.x, self._point.y, val)
+    self._occupantChanged(previous)
+
+  def _kindChanged(self):
+    super()._kindChanged()
+    self._grid.cellChanged(self)
+
+  def _occupantChanged(self, previous):
+    super()._occupantChanged(previous)
+    self._grid.occupantChanged(self, previous)
+
+  def __eq__(self, other):
+    return isinstance(other, GridCell) and self._grid is other._grid and self._point == other._point
+
+  def __hash__(self):
+    return hash(self._point)
@@ -0,0 +1,109 @@
+from array import array
+from collections import deque
+
+"""
+  Estimates of the cost left between two (x, y) positions, in integer
+  arithmetic. Each of them never overestimates on the 4-connected grid
+  with Edges of cost 1, so the searches using them stay optimal.
+"""
+
+"""
+  ALT, the lower bound the triangle inequality gives on the exact distances
+  from a few landmarks: d(a, b) >= |d(L, a) - d(L, b)| for every landmark
+  L, and never below the Manhattan distance. Landmarks are picked among
+  the candidates one after the other, each the farthest from the ones
+  picked before, and their distances to every Node come from one breadth
+  first search each. Made for a Graph whose layout does not change
+  anymore, Cells blocked later only make the bound looser.
+"""
+class LandmarkHeuristic:
+  unreachable = -1
+
+  """
+    - distances is List<array<int>>, steps from each landmark by Node id
+    - graph is Graph or GridGraph
+    - landmarks is List<Integer>, ids of the landmarks
+  """
+  def __init__(self, graph, count, candidates):
+    self._distances = []
+    self._graph = graph
+    self._landmarks = []
+    if len(candidates) == 0:
+      return
+
+    nearest = self._distancesFrom(candidates[0])
+    while len(self._landmarks) < min(count, len(candidates)):
+      best = None
+      for candidate in candidates:
+        if nearest[candidate] == LandmarkHeuristic.unreachable or candidate in self._landmarks:
+          continue
+        if best == None or nearest[candidate] > nearest[best]:
+          best = candidate
+      if best == None:
+        break
+
+      distances = self._distancesFrom(best)
+      self._landmarks.append(best)
+      self._distances.append(distances)
+      for candidate in candidates:
+        if distances[candidate] < nearest[candidate]:
+          nearest[candidate] = distances[candidate]
+
+  @property
+  def landmarks(self):
+    return self._landmarks
+
+  def estimate(self, position, other):
+    result = abs(position[0] - other[0]) + abs(position[1] - other[1])
+    node = self._graph.idAt(position[0], position[1])
+    target = self._graph.idAt(other[0], other[1])
+    if node == None or target == None:
+      return result
+
+    for distances in self._distances:
+      if distances[node] == LandmarkHeuristic.unreachable or distances[target] == LandmarkHeuristic.unreachable:
+        continue
+      bound = abs(distances[node] - distances[target])
+      if bound > result:
+        result = bound
+    return result
+
+  def _distancesFrom(self, landmark):
+    result = array("i", [LandmarkHeuristic.unreachable]) * self._graph.size
+    result[landmark] = 0
+    queue = deque([landmark])
+    while len(queue) > 0:
+      current = queue.popleft()
+      distance = result[current] + 1
+      for node in self._graph.neighboursOf(current):
+        if result[node] == LandmarkHeuristic.unreachable:
+          result[node] = distance
+          queue.append(node)
+    return result
+
+"""
+  Exact on open ground of the 4-connected grid, the default
+"""
+class ManhattanHeuristic:
+
+  def estimate(self, position, other):
+    return abs(position[0] - other[0]) + abs(position[1] - other[1])
+
+"""
+  Diagonal steps counted as 1.41, rounded down so that it stays below the
+  Manhattan distance, for Graphs that also connect the diagonals
+"""
+class OctileHeuristic:
+
+  def estimate(self, position, other):
+    dx = abs(position[0] - other[0])
+    dy = abs(position[1] - other[1])
+    return max(dx, dy) + (41 * min(dx, dy)) // 100
+
+"""
+  No estimate at all, turns A* into Dijkstra
+"""
+class ZeroHeuristic:
+
+  def estimate(self, position, other):
+    return 0
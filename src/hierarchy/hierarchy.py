@@ -0,0 +1,245 @@
+from array import array
+from time import perf_counter
+
+from src.cell.cell import CellType
+from src.graph.graph import Graph, PriorityNodes
+from src.logger.logger import Logger
+from src.stats.stats import SearchStats
+
+"""
+  Hierarchical path finding with the Rooms and the Paths between them as
+  clusters. A cluster is a connected area of floor Cells (a Room) or of
+  path Cells (a corridor). Portals are the Room Cells that touch a
+  corridor, i.e. the entrances. The shortest walk inside a cluster between
+  every two of its portals is computed once, together with the walk from
+  every portal to every Cell of its clusters. A query between clusters
+  therefore searches only the small graph of portals and joins stored walks.
+  Same solve(start, target) API as Astar.
+"""
+class HierarchicalSearch:
+
+  """
+    - clusters is array<int>, cluster of every Node by id
+    - expanded is Integer, Nodes and portals expanded by the last solve
+    - graph is Graph
+    - links is Dictionary<Integer, List<(Integer, Number, List<Integer>)>>, from every portal id
+    - log is Logger
+    - portals is Dictionary<Integer, List<Integer>>, ids of the portals of every cluster
+    - totals is SearchStats, every solve so far
+    - trees is Dictionary<(Integer, Integer), (Dictionary<Integer, Number>, Dictionary<Integer, Integer>)>,
+      shortest distances and parents from a portal id within one of its clusters
+  """
+  def __init__(self, graph):
+    self._log = Logger()
+    self._graph = graph
+    self._clusters = None
+    self._expanded = 0
+    self._links = dict()
+    self._portals = dict()
+    self._totals = SearchStats()
+    self._trees = dict()
+    self._initClusters()
+    self._initPortals()
+    self._initLinks()
+    self._log.info("HierarchicalSearch", "Init -- {} Clusters -- {} Portals".format(
+      len(self._portals),
+      len(self._links)
+    ))
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def graph(self):
+    return self._graph
+
+  @property
+  def totals(self):
+    return self._totals.copy()
+
+  """
+    The Nodes from the start to the target, both included, or an empty List
+    when the target can not be reached
+  """
+  def solve(self, start, target):
+    began = perf_counter()
+    self._expanded = 0
+    source = self._graph.idOf(start)
+    destination = self._graph.idOf(target)
+    if source == None or destination == None:
+      return []
+
+    cluster = self._clusters[source]
+    result = None
+    if cluster == self._clusters[destination]:
+      distances, parents = self._shortestWithin(source, cluster)
+      if destination in distances:
+        result = HierarchicalSearch._walk(parents, destination)
+
+    if result == None:
+      result = self._solveAbstract(source, destination)
+    self._totals.add(SearchStats(1, self._expanded, 0, 0, 0, len(result), perf_counter() - began))
+    return [self._graph.nodeOf(node) for node in result]
+
+  def _initClusters(self):
+    self._clusters = array("i", [Graph.none]) * self._graph.size
+    count = 0
+    for node in self._graph.ids():
+      if not self._clusters[node] == Graph.none:
+        continue
+
+      room = self._isRoomCell(node)
+      pending = [node]
+      self._clusters[node] = count
+      while len(pending) > 0:
+        current = pending.pop()
+        for other in self._graph.neighboursOf(current):
+          if not self._clusters[other] == Graph.none or not self._isRoomCell(other) == room:
+            continue
+          self._clusters[other] = count
+          pending.append(other)
+
+      self._portals[count] = []
+      count += 1
+
+  def _initLinks(self):
+    for cluster, portals in self._portals.items():
+      for portal in portals:
+        distances, parents = self._shortestWithin(portal, cluster)
+        self._trees[(portal, cluster)] = (distances, parents)
+        links = self._links.setdefault(portal, [])
+        for other in portals:
+          if other == portal or not other in distances:
+            continue
+          links.append((
+            other,
+            distances[other],
+            HierarchicalSearch._walk(parents, other)
+          ))
+
+  def _initPortals(self):
+    for node in self._graph.ids():
+      if not self._isRoomCell(node):
+        continue
+
+      corridors = set()
+      for other in self._graph.neighboursOf(node):
+        if not self._isRoomCell(other):
+          corridors.add(self._clusters[other])
+
+      if len(corridors) > 0:
+        self._portals[self._clusters[node]].append(node)
+        for corridor in corridors:
+          self._portals[corridor].append(node)
+
+  def _isRoomCell(self, node):
+    kind = self._graph.kindOf(node)
+    return kind == CellType.FLOOR or kind == CellType.ENTRANCE
+
+  """
+    The stored trees of the portals of the cluster of the node that reach it
+  """
+  def _reachablePortals(self, node):
+    result = dict()
+    cluster = self._clusters[node]
+    for portal in self._portals.get(cluster, []):
+      tree = self._trees[(portal, cluster)]
+      if node in tree[0]:
+        result[portal] = tree
+    return result
+
+  """
+    Dijkstra over the cells of the cluster, portals of the cluster that lie
+    outside of it are reached but not expanded
+  """
+  def _shortestWithin(self, source, cluster):
+    portals = set(self._portals.get(cluster, []))
+    distances = {source: 0}
+    parents = {source: None}
+    done = set()
+    pq = PriorityNodes()
+    pq.insert(source, 0)
+
+    while not pq.empty():
+      current = pq.pop()
+      done.add(current)
+      self._expanded += 1
+      if not current == source and not self._clusters[current] == cluster:
+        continue
+
+      for node, cost in self._graph.arcsOf(current):
+        if node in done or not (self._clusters[node] == cluster or node in portals):
+          continue
+
+        cost += distances[current]
+        if not node in distances or cost < distances[node]:
+          distances[node] = cost
+          parents[node] = current
+          pq.insert(node, cost)
+
+    return distances, parents
+
+  def _solveAbstract(self, source, destination):
+    exits = self._reachablePortals(destination)
+    distances = dict()
+    parents = dict()
+    walks = dict()
+    done = set()
+    pq = PriorityNodes()
+    for key, tree in self._reachablePortals(source).items():
+      distances[key] = tree[0][source]
+      parents[key] = None
+      walks[key] = list(reversed(HierarchicalSearch._walk(tree[1], source)))
+      pq.insert(key, distances[key])
+
+    while not pq.empty():
+      key = pq.pop()
+      done.add(key)
+      self._expanded += 1
+
+      if key == "target":
+        break
+
+      if key in exits:
+        tree = exits[key]
+        cost = distances[key] + tree[0][destination]
+        if not "target" in distances or cost < distances["target"]:
+          distances["target"] = cost
+          parents["target"] = key
+          walks["target"] = HierarchicalSearch._walk(tree[1], destination)
+          pq.insert("target", cost)
+
+      for other, link_cost, walk in self._links.get(key, []):
+        if other in done:
+          continue
+        cost = distances[key] + link_cost
+        if not other in distances or cost < distances[other]:
+          distances[other] = cost
+          parents[other] = key
+          walks[other] = walk
+          pq.insert(other, cost)
+
+    if not "target" in done:
+      return []
+
+    segments = []
+    key = "target"
+    while not key == None:
+      segments.append(walks[key])
+      key = parents[key]
+    segments.reverse()
+
+    result = list(segments[0])
+    for walk in segments[1:]:
+      result.extend(walk[1:])
+    return result
+
+  @staticmethod
+  def _walk(parents, node):
+    result = []
+    while not node == None:
+      result.append(node)
+      node = parents[node]
+    result.reverse()
+    return result
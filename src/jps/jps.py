@@ -0,0 +1,215 @@
+from array import array
+
+from src.graph.graph import Astar, Graph, NodeState
+
+"""
+  Jump Point Search for a Graph of a 4-connected grid with uniform Edges.
+  Straight runs without forced neighbours are skipped in one jump, so only
+  the Nodes where the path may turn are pushed to the open list.
+  Same start and target API as Astar, path() returns every Cell on the way.
+  Where a jump stops along every row and column is worked out once, on the
+  first search, so a jump is a lookup plus the check for the target.
+"""
+class JumpPointSearch(Astar):
+
+  """
+    - ends is Dictionary<(Integer, Integer), array<int>>, by direction the last
+      coordinate on the axis before a wall, -1 on a wall
+    - span is Integer, the y Cells of a row of the tables
+    - stops is Dictionary<(Integer, Integer), array<int>>, by direction the
+      coordinate on the axis of the first jump point, -1 when there is none
+      before a wall
+  """
+  def __init__(self, graph, heuristic=None):
+    self._ends = None
+    self._span = 0
+    self._stops = None
+    super().__init__(graph, heuristic)
+    if not graph.uniform:
+      self._log.info("JumpPointSearch", "EXPECTED A GRAPH WITH UNIFORM EDGES")
+      exit(1)
+
+  def path(self):
+    jump_points = super().path()
+    if len(jump_points) == 0:
+      return jump_points
+
+    result = [jump_points[0]]
+    for node in jump_points[1:]:
+      x = result[-1].cell.point.x
+      y = result[-1].cell.point.y
+      dx = JumpPointSearch._direction(x, node.cell.point.x)
+      dy = JumpPointSearch._direction(y, node.cell.point.y)
+      while not (x == node.cell.point.x and y == node.cell.point.y):
+        x += dx
+        y += dy
+        result.append(self._graph.nodeAt(x, y))
+    return result
+
+  def _allocate(self):
+    super()._allocate()
+    if self._stops == None:
+      self._buildJumps()
+
+  """
+    A jump along x stops where a wall beside the row ends. A jump along y
+    also stops where one along x from its sides would find a jump point,
+    so those are marked once the rows are done.
+  """
+  def _buildJumps(self):
+    rows = 0
+    span = 0
+    for node in self._graph.ids():
+      x, y = self._graph.coordinatesOf(node)
+      rows = max(rows, x + 1)
+      span = max(span, y + 1)
+    self._span = span
+    self._stops = dict()
+    self._ends = dict()
+
+    width = span + 2
+    open_cells = bytearray((rows + 2) * width)
+    for node in self._graph.ids():
+      x, y = self._graph.coordinatesOf(node)
+      open_cells[(x + 1) * width + y + 1] = 1
+
+    for dx in (1, -1):
+      stops = array("i", [-1]) * (rows * span)
+      ends = array("i", [-1]) * (rows * span)
+      xs = range(rows - 1, -1, -1) if dx == 1 else range(rows)
+      back = dx * width
+      for y in range(span):
+        stop = -1
+        end = -1
+        for x in xs:
+          cell = (x + 1) * width + y + 1
+          if open_cells[cell] == 0:
+            stop = -1
+            end = -1
+            continue
+          if end == -1:
+            end = x
+          if (open_cells[cell - 1] and not open_cells[cell - 1 - back]) or (open_cells[cell + 1] and not open_cells[cell + 1 - back]):
+            stop = x
+          stops[x * span + y] = stop
+          ends[x * span + y] = end
+      self._stops[(dx, 0)] = stops
+      self._ends[(dx, 0)] = ends
+
+    below = self._stops[(1, 0)]
+    above = self._stops[(-1, 0)]
+    for dy in (1, -1):
+      stops = array("i", [-1]) * (rows * span)
+      ends = array("i", [-1]) * (rows * span)
+      ys = range(span - 1, -1, -1) if dy == 1 else range(span)
+      for x in range(rows):
+        stop = -1
+        end = -1
+        for y in ys:
+          cell = (x + 1) * width + y + 1
+          if open_cells[cell] == 0:
+            stop = -1
+            end = -1
+            continue
+          if end == -1:
+            end = y
+          if (open_cells[cell - width] and not open_cells[cell - width - dy]) or (open_cells[cell + width] and not open_cells[cell + width - dy]):
+            stop = y
+          elif open_cells[cell + width] and not below[(x + 1) * span + y] == -1:
+            stop = y
+          elif open_cells[cell - width] and not above[(x - 1) * span + y] == -1:
+            stop = y
+          stops[x * span + y] = stop
+          ends[x * span + y] = end
+      self._stops[(0, dy)] = stops
+      self._ends[(0, dy)] = ends
+
+  @staticmethod
+  def _direction(src, dst):
+    if dst > src:
+      return 1
+    if dst < src:
+      return -1
+    return 0
+
+  def _expand(self, current):
+    self._expanded += 1
+
+    if current == self._target:
+      self._markSolved()
+      return
+
+    self._touch(current)
+    self._states[current] = NodeState.BLACK.value
+    x, y = self._graph.coordinatesOf(current)
+
+    for nx, ny in self._neighboursOf(current):
+      node = self._jump(nx, ny, x, y)
+      if node == None or self._stateOf(node) == NodeState.BLACK.value:
+        continue
+
+      px, py = self._graph.coordinatesOf(node)
+      cost = self._costs[current] + abs(px - x) + abs(py - y)
+      if cost >= self._costOf(node):
+        continue
+
+      self._touch(node)
+      self._costs[node] = cost
+      self._estimates[node] = cost + self._estimate(node)
+      self._parents[node] = current
+      self._states[node] = NodeState.GRAY.value
+      self._emplace(node)
+
+  """
+    The id of the first jump point from (x; y) moving away from (px; py),
+    or None. The target stops a jump along x when it is on the run, and
+    one along y on the row where a jump along x would reach it.
+  """
+  def _jump(self, x, y, px, py):
+    node = self._graph.idAt(x, y)
+    if node == None:
+      return None
+
+    dx = x - px
+    dy = y - py
+    index = x * self._span + y
+    tx, ty = self._graph.coordinatesOf(self._target)
+
+    if not dx == 0:
+      stop = self._stops[(dx, 0)][index]
+      end = self._ends[(dx, 0)][index]
+      if ty == y and 0 <= (tx - x) * dx <= (end - x) * dx and (stop == -1 or (tx - x) * dx < (stop - x) * dx):
+        stop = tx
+      if stop == -1:
+        return None
+      return self._graph.idAt(stop, y)
+
+    stop = self._stops[(0, dy)][index]
+    end = self._ends[(0, dy)][index]
+    if 0 <= (ty - y) * dy <= (end - y) * dy and (stop == -1 or (ty - y) * dy < (stop - y) * dy):
+      row = x * self._span + ty
+      if self._ends[(-1, 0)][row] <= tx <= self._ends[(1, 0)][row]:
+        stop = ty
+    if stop == -1:
+      return None
+    return self._graph.idAt(x, stop)
+
+  def _neighboursOf(self, node):
+    x, y = self._graph.coordinatesOf(node)
+    parent = self._parentOf(node)
+
+    if parent == Graph.none:
+      candidates = [(x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)]
+    else:
+      px, py = self._graph.coordinatesOf(parent)
+      dx = JumpPointSearch._direction(px, x)
+      dy = JumpPointSearch._direction(py, y)
+      if not dx == 0:
+        candidates = [(x, y - 1), (x, y + 1), (x + dx, y)]
+      else:
+        candidates = [(x - 1, y), (x + 1, y), (x, y + dy)]
+
+    return [(cx, cy) for cx, cy in candidates if self._walkable(cx, cy)]
+
+  def _walkable(self, x, y):
+    return not self._graph.idAt(x, y) == None
@@ -1,27 +1,68 @@
+from collections import deque
 from queue import PriorityQueue
 from random import seed, randint
 
+from src.budget.budget import PlanningBudget
+from src.cache.cache import PathCache
 from src.logger.logger import Logger
-from src.cell.cell import CellType, Cell
-from src.graph.graph import Astar, Edge, Node, NodeState
+from src.nearest.nearest import NearestTargets
+from src.reservation.reservation import ReservationTable, SpaceTimeAstar
+from src.service.service import PathService
+from src.cell.cell import CellType
+from src.flow.flow import FlowFields
+from src.graph.graph import Astar, BidirectionalAstar, Edge, Graph, GridGraph, Node, NodeState
+from src.grid.grid import Grid
+from src.heuristic.heuristic import LandmarkHeuristic
 from src.room.room import Room
+from src.route.route import RouteTable
 from src.soldier.soldier import Soldier
+from src.stats.stats import SearchStats
 
 """
   Contains Cells, Rooms, Soldiers
 """
 class Maze:
+  stats_ticks = 1000
 
   """
-    - edges is List<Edge>
+    - budget is PlanningBudget of the searches of the Soldiers, refilled every
+      tick, None when they are not bounded
+    - edges is List<Edge> the Rooms are connected on, None once the navigation
+      Graph is built or when the Graphs are implicit
+    - flows is FlowFields on the navigation Graph, None when disabled
+    - generation_stats is SearchStats, the searches that connected the Rooms
+    - grid is Grid, kinds and occupants of the Cells, Cells are views on it
+    - heuristic is LandmarkHeuristic on the navigation Graph, landmarks picked
+      among the Room centers, None for the Manhattan distance
+    - implicit is Boolean, True when the Graphs read the neighbours from the
+      Grid instead of storing Nodes and Edges
     - log is Logger
-    - map is List<List<Cell>>
-    - nodes is List<List<Nodes>>
+    - loops is Integer, corridors added on top of the spanning tree of the Rooms
+    - navigation is Graph or GridGraph of the passable Cells, shared by all Soldiers
+    - nearest is NearestTargets on the navigation Graph, the nearest Packages
+      and enemies of every Cell
+    - nodes is List<List<Nodes>> the Rooms are connected on, None once the
+      navigation Graph is built or when the Graphs are implicit
+    - paths is PathCache on the navigation Graph
+    - planner is SpaceTimeAstar planning around the reservations, None when
+      the Soldiers do not cooperate
+    - reservations is ReservationTable, None when the Soldiers do not cooperate
     - rooms is List<Room>
+    - routes is RouteTable between the Room centers and the entrances
+    - service is PathService of the plan-once searches, None when the
+      Soldiers search by themselves
+    - seen is Dictionary<Object, SearchStats>, totals of every Soldier by id
+      and of every shared engine by name when the last tick ended
+    - stats is SearchStats, the searches of every tick played
+    - tick is Integer, turns played so far
+    - tick_stats is deque<SearchStats>, the searches of each of the last
+      stats_ticks ticks
   """
-  def __init__(self, height, width, rooms_count):
+  def __init__(self, height, width, rooms_count, cache_capacity=None, engine=Astar, flow_fields=True, loops=0, cooperative=False, implicit=False, planning_budget=None, service_workers=0, landmarks=0):
     self._log = Logger()
     self._log.debug("Maze", "Object Init")
+    self._implicit = implicit
+    self._loops = loops
     
     self._initMap(height, width)
     self._markWalls()
@@ -29,22 +70,100 @@ class Maze:
     self._initNodes()
     self._initEdges()
     self._connectRooms()
+    self._initNavigation()
+    self._releaseGeneration()
+    self._routes = RouteTable(self._navigation, self._rooms)
+    self._initHeuristic(landmarks)
+    self._initPathCache(cache_capacity, engine)
+    self._initFlowFields(flow_fields)
+    self._initNearestTargets()
+    self._initReservations(cooperative)
+    self._initBudget(planning_budget)
+    self._initService(service_workers, engine)
+    self._seen = dict()
+    self._stats = SearchStats()
     self._teams = []
+    self._tick = 0
+    self._tick_stats = deque(maxlen=Maze.stats_ticks)
+
+  @property
+  def budget(self):
+    return self._budget
 
   @property
   def edges(self):
     return self._edges
   
+  @property
+  def flows(self):
+    return self._flows
+
+  @property
+  def generation_stats(self):
+    return self._generation_stats
+
+  @property
+  def grid(self):
+    return self._grid
+
+  @property
+  def heuristic(self):
+    return self._heuristic
+
+  @property
+  def implicit(self):
+    return self._implicit
+
+  @property
+  def navigation(self):
+    return self._navigation
+  
+  @property
+  def nearest(self):
+    return self._nearest
+
+  @property
+  def paths(self):
+    return self._paths
+  
+  @property
+  def planner(self):
+    return self._planner
+
+  @property
+  def reservations(self):
+    return self._reservations
+
   @property
   def rooms(self):
     return self._rooms
 
+  @property
+  def routes(self):
+    return self._routes
+
   @property
   def teams(self):
     return self._teams
+
+  @property
+  def service(self):
+    return self._service
+
+  @property
+  def stats(self):
+    return self._stats
+
+  @property
+  def tick(self):
+    return self._tick
+
+  @property
+  def tick_stats(self):
+    return self._tick_stats
   
   def height(self):
-    return len(self._map)
+    return self._grid.height
   
   def placeBox(self, box):
     # TODO
@@ -69,22 +188,42 @@ class Maze:
     
     self._teams.append(team)
 
+  """
+    Stops the worker processes of the PathService, the Maze can not be
+    played once it is shut down
+  """
+  def shutdown(self):
+    if not self._service == None:
+      self._service.shutdown()
+
+  """
+    A Node for every passable Cell, connected to the passable Cells above,
+    left, right and below it, found through an index of the Nodes by (x, y)
+  """
   def uniqueNodesSharedCells(self):
     result = []
+    index = dict()
     
-    for row in self._map:
-      for cell in row:
-        if cell.isPassable():
-          result.append(Node(cell))
+    passable = [CellType.FLOOR, CellType.PATH, CellType.ENTRANCE]
+    for x, y in self._grid.pointsOf(passable):
+      node = Node(self._grid.cellAt(x, y))
+      index[(x, y)] = node
+      result.append(node)
 
     for node in result:
-      for other in result:
-        if node.cell.point.distance(other.cell.point) == 1:
+      x = node.cell.point.x
+      y = node.cell.point.y
+      for position in ((x - 1, y), (x, y - 1), (x, y + 1), (x + 1, y)):
+        other = index.get(position)
+        if not other == None:
           node.addNeighbour(other)
     
     return result
   
   def updateTeamsState(self):
+    self._recordStats()
+    if not self._budget == None:
+      self._budget.refill()
     to_remove = []
 
     for team in self._teams:
@@ -93,59 +232,60 @@ class Maze:
 
     for team in to_remove:
       self._teams.remove(team)
+
+    self._tick += 1
+    self._nearest.advance()
+    if not self._reservations == None:
+      self._reservations.advance()
   
   def width(self):
-    return len(self._map[0])
+    return self._grid.width
   
   def _cellBy(self, point):
-    for row in self._map:
-      for cell in row:
-        if cell.point == point:
-          return cell
-    return None
+    if point.x < 0 or point.x >= self.height() or point.y < 0 or point.y >= self.width():
+      return None
+    return self._grid.cellAt(point.x, point.y)
   
   def _connectRooms(self):
     self._log.debug("Maze", "Connect {} Rooms".format(len(self.rooms)))
-    nodes = []
-    connected = dict()
-    for room in self._rooms:
-      connected[room] = []
-    
-    for row in self._nodes:
-      for node in row:
-        nodes.append(node)
+    if self._implicit:
+      graph = GridGraph(self._grid, [CellType.SPACE, CellType.PATH, CellType.FLOOR, CellType.ENTRANCE])
+    else:
+      nodes = []
+      for row in self._nodes:
+        for node in row:
+          nodes.append(node)
+      graph = Graph(nodes, self._edges, self._grid)
     
-    astar = Astar(nodes, self._edges)
+    search = BidirectionalAstar(graph)
     
-    for room in self._rooms:
+    for room, other in self._roomConnections():
+      self._log.debug("Maze", "Connecting room center {} to room center {}".format(
+        str(room.center.point),
+        str(other.center.point)
+      ))
+      path = search.solve(room.center, other.center)
+      if len(path) == 0:
+        self._log.info("Maze", "NO PATH WAS FOUND BETWEEN THE ROOMS")
+        exit(1)
 
-      for other in self._rooms:
-        if not room == other and not other in connected[room]:
-          self._log.debug("Maze", "Connecting room center {} to room center {}".format(
-            str(room.center.point),
-            str(other.center.point)
-          ))
-          astar.resetAlgorithm()
-          astar.updateNodeToStateStartBy(room.center)
-          astar.updateNodeToStateTargetBy(other.center)
-
-          while not astar.solved:
-            if astar.noSolution():
-              self._log.info("Maze", "NO PATH WAS FOUND BETWEEN THE ROOMS")
-              exit(1)
-            astar.nextIteration()
-
-          target = astar.target
-          if target == None or target.parent == None:
-            self._log.info("Maze", "EXPECTED A PATH, BUT NONE WAS RETURNED")
-            exit(1)
-          self._markPathAndEntrances(target)
-          connected[room].append(other)
-          connected[other].append(room)
+      if len(path) < 2:
+        self._log.info("Maze", "EXPECTED A PATH, BUT NONE WAS RETURNED")
+        exit(1)
+      self._markPathAndEntrances(path)
+    self._generation_stats = search.totals
  
+  def _initBudget(self, per_tick):
+    self._budget = None
+    if not per_tick == None:
+      self._budget = PlanningBudget(per_tick)
+
   def _initEdges(self):
-    self._edges = []
+    self._edges = None
+    if self._implicit:
+      return
     
+    self._edges = []
     i = 1
     while i < len(self._nodes):
       
@@ -165,37 +305,75 @@ class Maze:
       i += 1
     self._log.info("Maze", "Init -- {} Edges".format(str(len(self._edges))))
 
-  def _initMap(self, height, width):
-    self._log.info("Maze", "Init Map -- {} x {} Cells".format(height, width))
-    result = []
+  def _initFlowFields(self, enabled):
+    self._flows = None
+    if not enabled:
+      return
     
-    i = 0
-    while i < height:
-      row = []
-      
-      j = 0
-      while j < width:
-        row.append(Cell(CellType.SPACE, i, j))
-        j += 1
-      
-      result.append(row)
-      i += 1
+    self._flows = FlowFields(self._navigation)
+    self._grid.addObserver(self._flows)
+
+  def _initHeuristic(self, landmarks):
+    self._heuristic = None
+    if landmarks <= 0:
+      return
     
-    self._map = result
+    centers = [self._navigation.idOf(room.center) for room in self._rooms]
+    self._heuristic = LandmarkHeuristic(self._navigation, landmarks, centers)
+    self._log.info("Maze", "Init -- {} Landmarks".format(len(self._heuristic.landmarks)))
+
+  def _initMap(self, height, width):
+    self._log.info("Maze", "Init Map -- {} x {} Cells".format(height, width))
+    self._grid = Grid(height, width, CellType.SPACE)
+
+  def _initNavigation(self):
+    if self._implicit:
+      self._navigation = GridGraph(self._grid, [CellType.FLOOR, CellType.PATH, CellType.ENTRANCE])
+    else:
+      self._navigation = Graph(self.uniqueNodesSharedCells(), self._edges, self._grid)
+
+  def _initNearestTargets(self):
+    self._nearest = NearestTargets(self._navigation)
+    self._grid.addObserver(self._nearest)
 
   def _initNodes(self):
+    self._nodes = None
+    if self._implicit:
+      return
+    
     result = []
-    for row in self._map:
+    i = 0
+    while i < self.height():
       row_of_nodes = []
       
-      for cell in row:
-        row_of_nodes.append(Node(cell))
+      j = 0
+      while j < self.width():
+        row_of_nodes.append(Node(self._grid.cellAt(i, j)))
+        j += 1
       
       result.append(row_of_nodes)
+      i += 1
     
     self._nodes = result
     self._log.info("Maze", "Init -- {} x {} Nodes".format(str(self.height()), str(self.width())))
 
+  def _initPathCache(self, capacity, engine):
+    self._paths = PathCache(self._navigation, capacity, engine, self._heuristic)
+    self._grid.addObserver(self._paths)
+
+  def _initReservations(self, cooperative):
+    self._planner = None
+    self._reservations = None
+    if not cooperative:
+      return
+    
+    if self._flows == None:
+      self._log.info("Maze", "COOPERATIVE PLANNING NEEDS THE FLOW FIELDS, PLANNING ALONE")
+      return
+    
+    self._reservations = ReservationTable()
+    self._planner = SpaceTimeAstar(self._navigation, self._reservations, self._flows)
+
   def _initRoom(self):
     max_size = self.height() - 1
     height = self._roomHeight(max_size)
@@ -234,6 +412,11 @@ class Maze:
     
     self._rooms = result
   
+  def _initService(self, workers, engine):
+    self._service = None
+    if workers > 0:
+      self._service = PathService(self._navigation, workers, engine)
+
   def _mapSoldierToCell(self, soldier, room):
     self._log.debug("Maze", "Map Soldier to Cell")
     for cell in room.floor:
@@ -243,22 +426,23 @@ class Maze:
         return
   
   def _markFloor(self, room):
-    i = int(room.center.point.x - room.width / 2)
-    while i < int(room.center.point.x + room.width / 2):
+    top, bottom, left, right = self._roomBounds(room)
+    self._grid.fill(CellType.FLOOR, top, bottom, left, right)
+
+    i = top
+    while i < bottom:
       
-      j = int(room.center.point.y - room.height / 2)
-      while j < int(room.center.point.y + room.height / 2):
-        cell = self._map[i][j]
-        cell.kind = CellType.FLOOR
-        room.appendCell(cell)
+      j = left
+      while j < right:
+        room.appendCell(self._grid.cellAt(i, j))
         j += 1
       
       i += 1
   
-  def _markPathAndEntrances(self, target):
+  def _markPathAndEntrances(self, path):
     last_cell = None
-    while not target.parent == None:
-      cell = self._cellBy(target.cell.point)
+    for node in reversed(path[1:]):
+      cell = self._cellBy(node.cell.point)
       
       if cell == None:
         self._log.info("Maze", "EXPECTED A CELL OBJECT FOR PATH MARK, GOT NONE")
@@ -275,22 +459,10 @@ class Maze:
           cell.kind = CellType.ENTRANCE
       
       last_cell = cell
-      target = target.parent
   
   def _markWalls(self):
     self._log.debug("Maze", "Mark Walls")
-    
-    for row in self._map:
-      next_cell = row[0]
-      next_cell.kind = CellType.WALL
-      next_cell = row[self.width() - 1]
-      next_cell.kind = CellType.WALL
-    
-    for c in self._map[0]:
-      c.kind = CellType.WALL
-    
-    for c in self._map[self.height() - 1]:
-      c.kind = CellType.WALL
+    self._grid.border(CellType.WALL)
   
   def _randomFreeFloorCell(self, room):
     seed()
@@ -329,20 +501,109 @@ class Maze:
     room_index = randint(0, len(self._rooms) - 1)
     return self._rooms[room_index]
   
+  """
+    Counts the searches run since the last tick, those of the Soldiers
+    that are still in the game and those of the engines they share
+  """
+  def _recordStats(self):
+    result = SearchStats()
+    totals = [(soldier.id, soldier.stats) for team in self._teams for soldier in team.soldiers]
+    totals.append(("paths", self._paths.stats))
+    totals.append(("nearest", self._nearest.totals))
+    if not self._flows == None:
+      totals.append(("flows", self._flows.totals))
+    if not self._planner == None:
+      totals.append(("planner", self._planner.totals))
+    for key, stats in totals:
+      if stats == None:
+        continue
+      result.add(stats.since(self._seen.get(key, SearchStats())))
+      self._seen[key] = stats
+
+    self._stats.add(result)
+    self._tick_stats.append(result)
+    self._log.debug("Maze", "Tick {} -- {}".format(self._tick, str(result)))
+
   def _registerNeighbours(self, node, other):
     node.addNeighbour(other)
+    point = node.cell.point
     self._edges.append(Edge(
       node,
       other,
-      node.cell.point.distance(other.cell.point)
+      abs(point.x - other.cell.point.x) + abs(point.y - other.cell.point.y)
     ))
   
+  """
+    The Nodes and Edges of every Cell are only needed to connect the Rooms
+    and to build the navigation Graph, which keeps its own arrays
+  """
+  def _releaseGeneration(self):
+    self._edges = None
+    self._nodes = None
+
   def _roomCenter(self, height, max_height, width, max_width):
     y = int(1 + (height / 2) + randint(0, max_height) % (max_height - height - 2))
     x = int(1 + (width / 2) + randint(0, max_width) % (max_width - width - 2))
-    result = self._map[x][y]
+    result = self._grid.cellAt(x, y)
     return result
   
+  """
+    Rows top <= x < bottom and columns left <= y < right of the Room floor
+  """
+  def _roomBounds(self, room):
+    return (
+      int(room.center.point.x - room.width / 2),
+      int(room.center.point.x + room.width / 2),
+      int(room.center.point.y - room.height / 2),
+      int(room.center.point.y + room.height / 2)
+    )
+
+  """
+    Pairs of Rooms along a minimum spanning tree of the Room centers by
+    their Manhattan distance, which keeps every Room reachable with one
+    corridor less than there are Rooms, followed by the loops closest
+    pairs left out of the tree
+  """
+  def _roomConnections(self):
+    result = []
+    if len(self._rooms) < 2:
+      return result
+    
+    closest = dict()
+    for room in self._rooms[1:]:
+      closest[room] = (self._roomDistance(self._rooms[0], room), self._rooms[0])
+    
+    while len(closest) > 0:
+      room = min(closest, key=lambda candidate: closest[candidate][0])
+      result.append((closest.pop(room)[1], room))
+      for other in closest:
+        distance = self._roomDistance(room, other)
+        if distance < closest[other][0]:
+          closest[other] = (distance, room)
+    
+    if self._loops > 0:
+      tree = set()
+      for room, other in result:
+        tree.add((room, other))
+        tree.add((other, room))
+      
+      left_out = []
+      for i, room in enumerate(self._rooms):
+        for other in self._rooms[i + 1:]:
+          if not (room, other) in tree:
+            left_out.append((self._roomDistance(room, other), i, room, other))
+      left_out.sort(key=lambda pair: pair[:2])
+      
+      for pair in left_out[:self._loops]:
+        result.append((pair[2], pair[3]))
+    
+    return result
+
+  def _roomDistance(self, room, other):
+    dx = abs(room.center.point.x - other.center.point.x)
+    dy = abs(room.center.point.y - other.center.point.y)
+    return dx + dy
+
   def _roomHeight(self, size):
     result = 7 + randint(0, size) % (size / 5)
     return int(result)
@@ -374,8 +635,9 @@ class Maze:
     for room in self._rooms:
       hasSoldiers = False
       
-      for cell in room.floor:
-        if cell.kind == CellType.FLOOR and isinstance(cell.obj, Soldier):
+      top, bottom, left, right = self._roomBounds(room)
+      for obj in self._grid.occupantsIn(top, bottom, left, right, CellType.FLOOR):
+        if isinstance(obj, Soldier):
           hasSoldiers = True
           break
       
@@ -385,14 +647,14 @@ class Maze:
     return None
 
   def __str__(self):
-    result = ""
+    result = []
     rows = self.height() - 1
     while rows >= 0:
       cells = self.width() - 1
       while cells >= 0:
-        result += str(self._map[rows][cells]) + "|"
+        result.append(self._grid.symbolAt(rows, cells) + "|")
         cells -= 1
-      result = result + "\n"
+      result.append("\n")
       rows -= 1
-    return result
+    return "".join(result)
     
\ No newline at end of file
@@ -0,0 +1,170 @@
+from array import array
+from collections import deque
+from time import perf_counter
+
+from src.logger.logger import Logger
+from src.package.package import HealthPackage, Package
+from src.soldier.soldier import Soldier
+from src.stats.stats import SearchStats
+
+"""
+  Nearest occupant of a kind, i.e. a Package type or the Soldiers of the
+  other Teams, from every Node of the shared Graph. One breadth first
+  search started from all the Cells holding such an occupant at once gives
+  the distance to the nearest one and which one it is for every Node, so
+  every Soldier asking is answered from the same field. A Package field is
+  kept until a Package of its kind is placed or picked up, or until a Cell
+  changes its kind. The Soldiers move every tick, so a field of enemies is
+  kept for the rest of the tick it was built in and tells where they stood
+  then, their moves only update where they are.
+  The occupants are followed through the observer calls, so the Grid has
+  to be observed before anything is placed on it.
+"""
+class NearestTargets:
+  followed = (Package, HealthPackage, Soldier)
+  unreachable = -1
+
+  """
+    - builds is Integer, fields computed so far
+    - fields is Dictionary<(Type, Integer), (array<int>, array<int>)>, distances and
+      nearest source by Node id, keyed by the kind and the Team left out
+    - graph is Graph
+    - hits is Integer
+    - log is Logger
+    - occupied is Dictionary<Integer, Object>, the occupant of every occupied Node id
+    - totals is SearchStats, the breadth first searches of every field built
+  """
+  def __init__(self, graph):
+    self._log = Logger()
+    self._builds = 0
+    self._fields = dict()
+    self._graph = graph
+    self._hits = 0
+    self._occupied = dict()
+    self._totals = SearchStats()
+    self._log.debug("NearestTargets", "Init Object -- {} Nodes".format(graph.size))
+
+  @property
+  def builds(self):
+    return self._builds
+
+  @property
+  def hits(self):
+    return self._hits
+
+  @property
+  def size(self):
+    return len(self._fields)
+
+  @property
+  def totals(self):
+    return self._totals.copy()
+
+  """
+    Drops the fields of the Soldiers once the tick is over
+  """
+  def advance(self):
+    for key in list(self._fields):
+      if key[0] == Soldier:
+        del self._fields[key]
+
+  def cellChanged(self, cell):
+    self._fields.clear()
+
+  """
+    Steps from the cell to the nearest occupant of the kind, None when
+    there is none reachable
+  """
+  def distance(self, cell, kind, team_id=None):
+    node = self._graph.idOf(cell)
+    if node == None:
+      return None
+
+    distances = self._fieldOf(kind, team_id)[0]
+    if distances[node] == NearestTargets.unreachable:
+      return None
+    return distances[node]
+
+  """
+    The Cell of the occupant of the kind nearest to the cell, leaving out
+    the Soldiers of the team_id when one is given, or None when there is
+    none reachable
+  """
+  def nearest(self, cell, kind, team_id=None):
+    node = self._graph.idOf(cell)
+    if node == None:
+      return None
+
+    sources = self._fieldOf(kind, team_id)[1]
+    if sources[node] == NearestTargets.unreachable:
+      return None
+    return self._graph.cellOf(sources[node])
+
+  def occupantChanged(self, cell, previous):
+    if not isinstance(previous, NearestTargets.followed) and not isinstance(cell.obj, NearestTargets.followed):
+      return
+
+    node = self._graph.idOf(cell)
+    if node == None:
+      return
+
+    if isinstance(cell.obj, NearestTargets.followed):
+      self._occupied[node] = cell.obj
+    else:
+      self._occupied.pop(node, None)
+
+    for key in list(self._fields):
+      if key[0] == Soldier:
+        continue
+      if isinstance(previous, key[0]) or isinstance(cell.obj, key[0]):
+        del self._fields[key]
+
+  def regionChanged(self, kind, top, bottom, left, right):
+    self._fields.clear()
+
+  def _build(self, kind, team_id):
+    began = perf_counter()
+    expanded = 0
+    edge_lookups = 0
+    distances = array("i", [NearestTargets.unreachable]) * self._graph.size
+    sources = array("i", [NearestTargets.unreachable]) * self._graph.size
+    queue = deque()
+    for node, obj in self._occupied.items():
+      if isinstance(obj, kind) and (team_id == None or not obj.team_id == team_id):
+        distances[node] = 0
+        sources[node] = node
+        queue.append(node)
+
+    while len(queue) > 0:
+      current = queue.popleft()
+      expanded += 1
+      distance = distances[current] + 1
+      for node in self._graph.neighboursOf(current):
+        edge_lookups += 1
+        if distances[node] == NearestTargets.unreachable:
+          distances[node] = distance
+          sources[node] = sources[current]
+          queue.append(node)
+
+    self._builds += 1
+    self._totals.add(SearchStats(1, expanded, expanded, 0, edge_lookups, 0, perf_counter() - began))
+    return distances, sources
+
+  def _fieldOf(self, kind, team_id):
+    key = (kind, team_id)
+    field = self._fields.get(key)
+    if not field == None:
+      self._hits += 1
+      return field
+
+    field = self._build(kind, team_id)
+    self._fields[key] = field
+    return field
+
+  def __str__(self):
+    return "{} fields -- {} occupants -- {} hits -- {} builds".format(
+      self.size,
+      len(self._occupied),
+      self._hits,
+      self._builds
+    )
@@ -32,7 +32,7 @@ class Point:
     return False
 
   def __hash__(self):
-    return hash(self.x) + hash(self.y)
+    return hash((self.x, self.y))
 
   def __str__(self):
     return "({}; {})".format(str(self.x), str(self.y))
\ No newline at end of file
@@ -0,0 +1,220 @@
+from time import perf_counter
+
+from src.flow.flow import FlowFields
+from src.graph.graph import PriorityNodes
+from src.logger.logger import Logger
+from src.stats.stats import SearchStats
+
+"""
+  The Cells the Soldiers have reserved for the coming ticks, shared by all
+  of them so that each plans around the moves the others already planned
+"""
+class ReservationTable:
+
+  """
+    - log is Logger
+    - owned is Dictionary<Integer, List<(Integer, Integer, Integer)>>, the slots of every owner
+    - slots is Dictionary<(Integer, Integer, Integer), Integer>, owner of every (x, y, tick)
+    - tick is Integer
+  """
+  def __init__(self):
+    self._log = Logger()
+    self._owned = dict()
+    self._slots = dict()
+    self._tick = 0
+
+  @property
+  def tick(self):
+    return self._tick
+
+  def advance(self):
+    self._tick += 1
+    for owner in list(self._owned):
+      slots = [slot for slot in self._owned[owner] if slot[2] >= self._tick]
+      for slot in self._owned[owner]:
+        if slot[2] < self._tick:
+          del self._slots[slot]
+      if len(slots) == 0:
+        del self._owned[owner]
+      else:
+        self._owned[owner] = slots
+
+  def holds(self, owner):
+    return owner in self._owned
+
+  def ownerAt(self, cell, tick):
+    return self._slots.get((cell.point.x, cell.point.y, tick))
+
+  def release(self, owner):
+    for slot in self._owned.pop(owner, []):
+      del self._slots[slot]
+
+  """
+    Reserves cells[k] for the tick first + k, dropping what the owner had
+    reserved before, a slot reserved by another owner is left to it
+  """
+  def reserve(self, owner, cells, first):
+    self.release(owner)
+    slots = []
+    for k, cell in enumerate(cells):
+      slot = (cell.point.x, cell.point.y, first + k)
+      if not slot in self._slots:
+        self._slots[slot] = owner
+        slots.append(slot)
+    self._owned[owner] = slots
+
+  def reservedByOther(self, cell, tick, owner):
+    other = self.ownerAt(cell, tick)
+    return not other == None and not other == owner
+
+"""
+  Windowed cooperative A*. Searches over (Node, tick) for the first window
+  ticks, waiting in place is a move as well, avoiding the slots others
+  reserved and swapping places with them. The rest of the way is read
+  from the flow field of the target, whose distances are also the exact
+  heuristic of the search.
+"""
+class SpaceTimeAstar:
+  default_window = 16
+
+  """
+    - expanded is Integer, states expanded by the last search
+    - flows is FlowFields
+    - graph is Graph
+    - log is Logger
+    - pushed is Integer, states pushed by the last search
+    - reservations is ReservationTable
+    - totals is SearchStats, every search so far
+    - window is Integer
+  """
+  def __init__(self, graph, reservations, flows, window=None):
+    if window == None:
+      window = SpaceTimeAstar.default_window
+    self._log = Logger()
+    self._expanded = 0
+    self._flows = flows
+    self._graph = graph
+    self._pushed = 0
+    self._reservations = reservations
+    self._totals = SearchStats()
+    self._window = window
+    self._log.debug("SpaceTimeAstar", "Init Object -- window of {} ticks".format(window))
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def reservations(self):
+    return self._reservations
+
+  @property
+  def totals(self):
+    return self._totals.copy()
+
+  @property
+  def window(self):
+    return self._window
+
+  """
+    The Cells the owner stands on from the current tick on, both ends
+    included and a Cell repeated for every tick spent waiting, or None
+    when the target can not be reached
+  """
+  def solve(self, start, target, owner):
+    began = perf_counter()
+    self._expanded = 0
+    self._pushed = 0
+    tick = self._reservations.tick
+    source = self._graph.idOf(start)
+    destination = self._graph.idOf(target)
+    field = self._flows.fieldTo(target)
+    if source == None or field == None or field[source] == FlowFields.unreachable:
+      return self._record(began, None)
+
+    first = (source, tick)
+    parents = {first: None}
+    distances = {first: 0}
+    pq = PriorityNodes()
+    pq.insert(first, (field[source], 0))
+    self._pushed += 1
+    end = None
+
+    while not pq.empty():
+      state = pq.pop()
+      node = state[0]
+      self._expanded += 1
+      if node == destination or state[1] - tick >= self._window:
+        end = state
+        break
+
+      for other in [node] + list(self._graph.neighboursOf(node)):
+        following = (other, state[1] + 1)
+        if following in distances or field[other] == FlowFields.unreachable:
+          continue
+
+        if self._blocked(node, other, state[1], destination, owner):
+          continue
+
+        distances[following] = distances[state] + 1
+        parents[following] = state
+        pq.insert(following, (distances[following] + field[other], -distances[following]))
+        self._pushed += 1
+
+    if end == None:
+      return self._record(began, None)
+
+    result = []
+    state = end
+    while not state == None:
+      result.append(self._graph.cellOf(state[0]))
+      state = parents[state]
+    result.reverse()
+
+    rest = self._flows.route(result[-1], target)
+    if rest == None:
+      return self._record(began, None)
+    return self._record(began, result + rest[1:])
+
+  """
+    Moving from the id node to the id other between tick and tick + 1 is not
+    possible when other is reserved or its owner comes the opposite way.
+    Packages block unless they are the target. Soldiers block on the first
+    tick, after it their reservations tell where they are, and a Soldier
+    that reserved nothing stays where it stands.
+  """
+  def _blocked(self, node, other, tick, target, owner):
+    cell = self._graph.cellOf(other)
+    if self._reservations.reservedByOther(cell, tick + 1, owner):
+      return True
+    if other == node:
+      return False
+
+    coming = self._reservations.ownerAt(self._graph.cellOf(node), tick + 1)
+    if not coming == None and not coming == owner:
+      if self._reservations.ownerAt(cell, tick) == coming:
+        return True
+
+    if cell.isEmpty() or other == target:
+      return False
+    if not cell.containsSoldier() or tick == self._reservations.tick:
+      return True
+    return not self._reservations.holds(cell.obj.id)
+
+  """
+    Adds the last search to the totals and hands its path back
+  """
+  def _record(self, began, path):
+    length = 0
+    if not path == None:
+      length = len(path)
+    self._totals.add(SearchStats(
+      1,
+      self._expanded,
+      self._pushed,
+      self._pushed + self._expanded,
+      0,
+      length,
+      perf_counter() - began
+    ))
+    return path
@@ -0,0 +1,242 @@
+from array import array
+from collections import deque
+
+from src.cell.cell import CellType
+from src.graph.graph import PriorityNodes
+from src.logger.logger import Logger
+
+"""
+  Shortest Routes between the Room centers and the entrances.
+  The layout of the Maze does not change once the Rooms are connected,
+  so the Routes are computed once, when the Maze is generated, and then
+  only looked up. One search from every waypoint gives its Routes to the
+  waypoints after it and, walked backward, theirs to it; it stops once
+  those are settled. Every Route is kept as the Node ids it passes and
+  read as Cells when it is asked for.
+"""
+class RouteTable:
+
+  """
+    - distances is Dictionary<((Integer, Integer), (Integer, Integer)), Number>
+    - entrances is List<Cell>
+    - expanded is Integer, Nodes taken off the queue by the last join or routeFrom
+    - graph is Graph
+    - log is Logger
+    - rooms is List<Room>
+    - routes is Dictionary<((Integer, Integer), (Integer, Integer)), array<int>>
+    - waypoints is List<Cell>
+  """
+  def __init__(self, graph, rooms):
+    self._log = Logger()
+    self._graph = graph
+    self._rooms = rooms
+    self._distances = dict()
+    self._entrances = []
+    self._expanded = 0
+    self._routes = dict()
+    self._waypoints = []
+    self._initWaypoints()
+    self._initRoutes()
+    self._log.info("RouteTable", "Init -- {} Waypoints -- {} Routes".format(
+      len(self._waypoints),
+      len(self._routes)
+    ))
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def waypoints(self):
+    return self._waypoints
+
+  def distance(self, cell, other):
+    return self._distances.get(RouteTable._key(cell, other))
+
+  """
+    Breadth first search from the cell over the traversable Cells until any
+    Cell of the route at index first or later is reached.
+    Returns the Cells to walk, excluding the cell itself, and the index of
+    the reached route Cell, or None when the route can not be reached
+    within radius steps.
+  """
+  def join(self, cell, route, first=0, radius=None):
+    self._expanded = 0
+    indexes = dict()
+    i = first
+    while i < len(route):
+      indexes[(route[i].point.x, route[i].point.y)] = i
+      i += 1
+
+    own = (cell.point.x, cell.point.y)
+    if own in indexes:
+      return [], indexes[own]
+
+    start = self._graph.idOf(cell)
+    if start == None:
+      return None
+
+    parents = {start: None}
+    depth = {start: 0}
+    queue = deque([start])
+    while len(queue) > 0:
+      current = queue.popleft()
+      self._expanded += 1
+      if not radius == None and depth[current] >= radius:
+        continue
+
+      for node in self._graph.neighboursOf(current):
+        if node in parents or not self._graph.cellOf(node).isTraversable():
+          continue
+        parents[node] = current
+        depth[node] = depth[current] + 1
+
+        key = self._graph.coordinatesOf(node)
+        if key in indexes:
+          walked = RouteTable._walk(parents, node)[1:]
+          return [self._graph.cellOf(node) for node in walked], indexes[key]
+        queue.append(node)
+
+    return None
+
+  def route(self, cell, other):
+    route = self._routes.get(RouteTable._key(cell, other))
+    if route == None:
+      return None
+    return [self._graph.cellOf(node) for node in route]
+
+  """
+    The Route to the target from the Room the cell is in, or from the
+    entrance the fewest steps away when the cell is not inside a Room
+  """
+  def routeFrom(self, cell, target):
+    self._expanded = 0
+    for room in self._rooms:
+      if room.partOfRoom(cell):
+        return self.route(room.center, target)
+
+    closest = self._closestEntrance(cell)
+    if closest == None:
+      return None
+    return self.route(closest, target)
+
+  def _breadthFrom(self, source, targets):
+    distances = {source: 0}
+    parents = {source: None}
+    left = len(targets - {source})
+    queue = deque([source])
+    while len(queue) > 0 and left > 0:
+      current = queue.popleft()
+      distance = distances[current] + 1
+      for node in self._graph.neighboursOf(current):
+        if not node in distances:
+          distances[node] = distance
+          parents[node] = current
+          queue.append(node)
+          if node in targets:
+            left -= 1
+
+    return distances, parents
+
+  """
+    Breadth first search from the cell until the first entrance is taken
+    off the queue, None when there is none reachable
+  """
+  def _closestEntrance(self, cell):
+    start = self._graph.idOf(cell)
+    if start == None:
+      return None
+
+    seen = {start}
+    queue = deque([start])
+    while len(queue) > 0:
+      current = queue.popleft()
+      self._expanded += 1
+      if self._graph.kindOf(current) == CellType.ENTRANCE:
+        return self._graph.cellOf(current)
+
+      for node in self._graph.neighboursOf(current):
+        if not node in seen:
+          seen.add(node)
+          queue.append(node)
+
+    return None
+
+  def _initRoutes(self):
+    for index, cell in enumerate(self._waypoints):
+      self._searchFrom(cell, self._waypoints[index + 1:])
+
+  def _initWaypoints(self):
+    for room in self._rooms:
+      self._waypoints.append(room.center)
+
+    for node in self._graph.idsOf([CellType.ENTRANCE]):
+      cell = self._graph.cellOf(node)
+      self._entrances.append(cell)
+      self._waypoints.append(cell)
+
+  @staticmethod
+  def _key(cell, other):
+    return ((cell.point.x, cell.point.y), (other.point.x, other.point.y))
+
+  """
+    Stores the Routes from the source to the targets and back
+  """
+  def _searchFrom(self, source, targets):
+    nodes = {self._graph.idOf(target) for target in targets}
+    distances, parents = self._shortestFrom(self._graph.idOf(source), nodes)
+    for target in targets:
+      node = self._graph.idOf(target)
+      if source.samePosition(target) or not node in distances:
+        continue
+
+      route = array("i", RouteTable._walk(parents, node))
+      key = RouteTable._key(source, target)
+      self._distances[key] = distances[node]
+      self._routes[key] = route
+      back = RouteTable._key(target, source)
+      self._distances[back] = distances[node]
+      self._routes[back] = route[::-1]
+
+  """
+    Distances and parents of the shortest paths from the id source, found
+    breadth first when every step costs the same, until every one of the
+    target ids is settled
+  """
+  def _shortestFrom(self, source, targets):
+    if self._graph.uniform:
+      return self._breadthFrom(source, targets)
+
+    distances = {source: 0}
+    parents = {source: None}
+    done = bytearray(self._graph.size)
+    left = len(targets)
+    pq = PriorityNodes()
+    pq.insert(source, 0)
+
+    while not pq.empty() and left > 0:
+      current = pq.pop()
+      done[current] = 1
+      if current in targets:
+        left -= 1
+
+      for node, cost in self._graph.arcsOf(current):
+        if done[node]:
+          continue
+
+        cost += distances[current]
+        if not node in distances or cost < distances[node]:
+          distances[node] = cost
+          parents[node] = current
+          pq.insert(node, cost)
+
+    return distances, parents
+
+  @staticmethod
+  def _walk(parents, node):
+    result = []
+    while not node == None:
+      result.append(node)
+      node = parents[node]
+    result.reverse()
+    return result
@@ -0,0 +1,148 @@
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from src.cell.cell import CellType
+from src.graph.graph import Astar, Graph, Node
+from src.grid.grid import Grid
+from src.logger.logger import Logger, LoggerLevel
+
+"""
+  Searches of the worker processes, on their own copy of the navigation
+  Graph made once when the worker starts
+"""
+_searches = dict()
+
+def _initWorker(points, engine):
+  Logger(LoggerLevel.INFO)
+  grid = Grid(max(x for x, _, _ in points) + 1, max(y for _, y, _ in points) + 1)
+  nodes = []
+  index = dict()
+  for x, y, kind in points:
+    grid.markKind(x, y, CellType(kind))
+    node = Node(grid.cellAt(x, y))
+    index[(x, y)] = node
+    nodes.append(node)
+
+  for node in nodes:
+    for dx, dy in ((-1, 0), (0, -1), (0, 1), (1, 0)):
+      other = index.get((node.cell.point.x + dx, node.cell.point.y + dy))
+      if not other == None:
+        node.addNeighbour(other)
+
+  _searches["graph"] = Graph(nodes, None, grid)
+  _searches["engine"] = engine(_searches["graph"])
+
+def _solveInWorker(start, target):
+  graph = _searches["graph"]
+  path = _searches["engine"].solve(graph.nodeAt(*start).cell, graph.nodeAt(*target).cell)
+  return [(node.cell.point.x, node.cell.point.y) for node in path]
+
+"""
+  Solves the path requests of the Soldiers in a pool of worker processes,
+  each holding a read-only copy of the navigation Graph, so the searches
+  run beside the game instead of inside its tick. A request is answered
+  at a later tick, the Soldier asks again every tick until the path is
+  there, walking its previous Route meanwhile. The path comes from where
+  the Soldier first asked, only a new target replaces what it asked for.
+  The Graph is sent to the workers as the kind of every passable Cell, on
+  which they rebuild a Grid and the 4-connected Graph with steps of cost 1.
+  A search that fails in a worker, or that the pool can not take any more,
+  is logged and run by a local Astar instead, at the tick it is asked for.
+"""
+class PathService:
+
+  """
+    - executor is ProcessPoolExecutor
+    - fallback is Astar on the navigation Graph, made on the first failed search
+    - graph is Graph or GridGraph, the navigation Graph of the Maze
+    - log is Logger
+    - requests is Dictionary<Integer, ((Integer, Integer), (Integer, Integer), Future)>,
+      the start, target and pending search of every owner
+    - served is Integer, paths handed back so far
+    - workers is Integer
+  """
+  def __init__(self, graph, workers, engine=Astar):
+    self._log = Logger()
+    self._fallback = None
+    self._graph = graph
+    self._requests = dict()
+    self._served = 0
+    self._workers = workers
+    points = []
+    for node in graph.ids():
+      x, y = graph.coordinatesOf(node)
+      points.append((x, y, graph.kindOf(node).value))
+    self._executor = ProcessPoolExecutor(workers, initializer=_initWorker, initargs=(points, engine))
+    self._log.debug("PathService", "Init Object -- {} workers".format(workers))
+
+  @property
+  def pending(self):
+    return len(self._requests)
+
+  @property
+  def served(self):
+    return self._served
+
+  @property
+  def workers(self):
+    return self._workers
+
+  def cancel(self, owner):
+    request = self._requests.pop(owner, None)
+    if not request == None:
+      request[2].cancel()
+
+  def ready(self, owner):
+    request = self._requests.get(owner)
+    return not request == None and request[2].done()
+
+  """
+    Asks for the path of the owner between the Cells, a request for the
+    same target already on its way is kept, any other one is dropped
+  """
+  def request(self, owner, start, target):
+    ends = ((start.point.x, start.point.y), (target.point.x, target.point.y))
+    request = self._requests.get(owner)
+    if not request == None and request[1] == ends[1]:
+      return
+
+    self.cancel(owner)
+    try:
+      future = self._executor.submit(_solveInWorker, ends[0], ends[1])
+    except RuntimeError as error:
+      future = Future()
+      future.set_exception(error)
+    self._requests[owner] = (ends[0], ends[1], future)
+
+  """
+    Nodes of the path the owner asked for, both ends included, an empty
+    list when the target can not be reached, or None while it is on its way
+  """
+  def result(self, owner):
+    if not self.ready(owner):
+      return None
+
+    request = self._requests.pop(owner)
+    self._served += 1
+    try:
+      path = request[2].result()
+    except Exception as error:
+      return self._solveLocally(request[0], request[1], error)
+    return [self._graph.nodeAt(x, y) for x, y in path]
+
+  def shutdown(self):
+    for owner in list(self._requests):
+      self.cancel(owner)
+    self._executor.shutdown()
+
+  def _solveLocally(self, start, target, error):
+    self._log.info("PathService", "SEARCH FAILED IN THE WORKERS, SOLVING IT HERE -- {}".format(repr(error)))
+    if self._fallback == None:
+      self._fallback = Astar(self._graph)
+    return self._fallback.solve(self._graph.nodeAt(*start).cell, self._graph.nodeAt(*target).cell)
+
+  def __str__(self):
+    return "{} workers -- {} pending -- {} served".format(
+      self._workers,
+      self.pending,
+      self._served
+    )
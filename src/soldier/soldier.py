@@ -1,8 +1,10 @@
 from enum import Enum
 from random import seed, randint
 
+from src.dstar.dstar import DStarLite
 from src.graph.graph import Astar
 from src.logger.logger import Logger
+from src.package.package import BulletPackage, GrenadePackage, HealthPackage
 
 """
   In case current target doesn't provide what the Soldier needs,
@@ -30,20 +32,36 @@ class SoldierVisualState(Enum):
 """
 class Soldier:
   count = 1
+  detour_radius = 8
   max_stuck = 3
   
   """
     - astar is Astar
     - at is Cell
+    - budget is PlanningBudget shared by all Soldiers, None when the searches
+      are not bounded
     - bullets is List<Bullet>
     - came_from is Cell
-    - edges is List<Edge>
+    - flows is FlowFields, None when the targets are found through the PathCache
     - grenades is List<Grenade>
     - health is Integer
     - id is Integer
     - max_health is Integer
-    - nodes is List<Node>
+    - nearest is NearestTargets, None when the targets are looked for in the Rooms
+    - paths is PathCache
+    - plan_once is Boolean, True when the Astar searches the whole path before
+      the first step and the Soldier follows it as a Route, False when the
+      search and the steps are interleaved
+    - planner is SpaceTimeAstar, None when the Soldier plans alone
+    - previous is List<Cell>, what was left of the last Route, walked while
+      the PathService searches the next path, None when there is nothing left
+    - replanner is DStarLite, repairs the way to the end of a blocked Route
     - rooms is List<Room>
+    - route is List<Cell>, the Cells left to walk are from route_cursor on
+    - route_cursor is Integer
+    - routes is RouteTable
+    - service is PathService solving the plan-once searches in worker
+      processes, None when the Soldier searches by itself
     - state is SoldierState
     - stuck is Integer
     - team_id is Integer
@@ -52,17 +70,27 @@ class Soldier:
   def __init__(self, max_health, team_id):
     self._astar = None
     self._at = None
+    self._budget = None
     self._bullets = []
     self._came_from = None
-    self._edges = None
+    self._flows = None
     self._grenades = []
     self._health = max_health
     self._id = Soldier.count
     Soldier.count += 1
     self._log = Logger()
     self._max_health = max_health
-    self._nodes = None
+    self._nearest = None
+    self._paths = None
+    self._plan_once = False
+    self._planner = None
+    self._previous = None
+    self._replanner = None
     self._rooms = None
+    self._route = None
+    self._route_cursor = 0
+    self._routes = None
+    self._service = None
     self._state = SoldierState.DISCOVERING
     self._stuck = 0
     self._team_id = team_id
@@ -74,6 +102,14 @@ class Soldier:
   def at(self):
     return self._at
   
+  @property
+  def budget(self):
+    return self._budget
+
+  @property
+  def flows(self):
+    return self._flows
+
   @property
   def id(self):
     return self._id
@@ -86,17 +122,85 @@ class Soldier:
   def team_id(self):
     return self._team_id
   
+  @property
+  def nearest(self):
+    return self._nearest
+
+  @property
+  def paths(self):
+    return self._paths
+
+  @property
+  def plan_once(self):
+    return self._plan_once
+
+  @property
+  def planner(self):
+    return self._planner
+
   @property
   def rooms(self):
     return self._rooms
 
+  @property
+  def routes(self):
+    return self._routes
+
+  @property
+  def service(self):
+    return self._service
+
+  """
+    Counters summed over every search of the Soldier's own Astar and of
+    its replanner
+  """
+  @property
+  def stats(self):
+    if self._astar == None:
+      return None
+    result = self._astar.totals
+    result.add(self._replanner.totals)
+    return result
+
   @at.setter
   def at(self, val):
     self._at = val
+
+  @budget.setter
+  def budget(self, val):
+    self._budget = val
+
+  @flows.setter
+  def flows(self, val):
+    self._flows = val
   
+  @nearest.setter
+  def nearest(self, val):
+    self._nearest = val
+
+  @paths.setter
+  def paths(self, val):
+    self._paths = val
+
+  @plan_once.setter
+  def plan_once(self, val):
+    self._plan_once = val
+
+  @planner.setter
+  def planner(self, val):
+    self._planner = val
+
   @rooms.setter
   def rooms(self, val):
     self._rooms = val
+
+  @routes.setter
+  def routes(self, val):
+    self._routes = val
+
+  @service.setter
+  def service(self, val):
+    self._service = val
   
   def blownWithGrenade(self, grenade):
     self._log.debug(
@@ -111,10 +215,9 @@ class Soldier:
     
     self._visual_state = SoldierVisualState.BLOWN_WITH_GRENADE
   
-  def initAstar(self, nodes, edges):
-    self._nodes = nodes
-    self._edges = edges
-    self._astar = Astar(self._nodes, self._edges)
+  def initAstar(self, graph, heuristic=None):
+    self._astar = Astar(graph, heuristic)
+    self._replanner = DStarLite(graph, heuristic)
 
   def nextMove(self):
     self._stuck = 0
@@ -127,13 +230,33 @@ class Soldier:
       return
 
     while True and self._stuck < Soldier.max_stuck:
-      if self._astar.target == None:
+      if self._astar.target == None and not self._followsRoute():
         self._noExistingTargetFlow()
 
+      if self._followsRoute():
+        self._followRouteFlow()
+        break
+
+      if self._plan_once:
+        if not self._searchOver():
+          if not self._followPreviousFlow():
+            self._followPartialPathFlow()
+          break
+        if not self._planPathFlow():
+          self._noOptionsLeftFlow()
+          self._stuck += 1
+        continue
+
       if self._astar.noOptionsLeft():
         self._noOptionsLeftFlow()
         self._stuck += 1
 
+      if not self._budget == None:
+        if self._budget.exhausted():
+          self._budget.suspend()
+          break
+        self._budget.spend(1)
+
       self._astar.nextIterationNeighbourPriority()
       last_analyzed = self._astar.last_analyzed
 
@@ -141,25 +264,8 @@ class Soldier:
         if self.mapTo(last_analyzed):
           break
       
-      else:
-        if self._haveSpottedSoldier(last_analyzed):
-          self._spottedSoldierFlow(last_analyzed)
-          break
-        
-        elif self._haveSpottedHealthPackage(last_analyzed):
-          if self._isLookingForHealth():
-            self._spottedHealthPackageFlow(last_analyzed)
-            break
-
-        elif self._haveSpottedBulletPackage(last_analyzed):
-          if self._isLookingForBullets():
-            self._spottedBulletPackageFlow(last_analyzed)
-            break
-
-        elif self._haveSpottedGrenadePackage(last_analyzed):
-          if self._isLookingForGrenades():
-            self._spottedGrenadePackageFlow(last_analyzed)
-            break
+      elif self._interactWith(last_analyzed):
+        break
 
     if self._astar.solved:
       self._astar.resetAlgorithm()
@@ -182,14 +288,16 @@ class Soldier:
     return False
   
   def removeFromGame(self):
+    if not self._service == None:
+      self._service.cancel(self._id)
+    self._resetRoute()
     self._at.removeObj()
   
   def resetAstar(self):
+    self._resetRoute()
     self._astar.resetSolved()
-    self._astar.resetStates()
-    self._astar.resetManhattan()
+    self._astar.resetSearch()
     self._astar.resetPriorityQueue()
-    self._astar.resetParents()
     self._astar.resetTarget()
       
   def resetVisualState(self):
@@ -224,9 +332,13 @@ class Soldier:
     return not self._visual_state == None
   
   def start(self):
+    if self._followsRoute():
+      return self._nodeBy(self._came_from)
     return self._astar.start
 
   def target(self):
+    if self._followsRoute():
+      return self._nodeBy(self._route[-1])
     return self._astar.target
    
   def updateAstarStart(self):
@@ -242,6 +354,9 @@ class Soldier:
     return len(self._grenades) == 0
   
   def _bulletPackage(self):
+    if not self._nearest == None:
+      return self._nearest.nearest(self._at, BulletPackage)
+
     room = self._currentRoom()
     
     if room == None:
@@ -253,7 +368,35 @@ class Soldier:
     
     return None
 
+  """
+    Takes the expansions of a search that runs to its end at once, as the
+    ones of the planner, the replanner, the PathCache and the RouteTable,
+    from the budget of the tick, so the searches that can wait get less
+  """
+  def _charge(self, expansions):
+    if not self._budget == None:
+      self._budget.spend(expansions)
+
+  def _detourFlow(self):
+    self._log.debug("Soldier #{}".format(str(self._id)), "The Route is blocked, looking for a detour")
+    if self._planRouteTo(self._route[-1]):
+      return True
+    
+    joined = self._routes.join(self._at, self._route, self._route_cursor + 1, Soldier.detour_radius)
+    self._charge(self._routes.expanded)
+    
+    if joined == None:
+      return self._replanFlow()
+    
+    detour, index = joined
+    self._route = detour + self._route[index + 1:]
+    self._route_cursor = 0
+    return True
+
   def _enemySoldierAt(self):
+    if not self._nearest == None:
+      return self._nearest.nearest(self._at, Soldier, self._team_id)
+
     for room in self._rooms:
       for cell in room.floor:
         if cell.containsSoldier():
@@ -261,6 +404,91 @@ class Soldier:
             return cell
     return None
   
+  """
+    A wait on the Route is planned again at every tick, the Soldiers it
+    waits for may have reserved their way since. A Route whose last Cell
+    holds something the Soldier does not act on ends next to it
+  """
+  def _followRouteFlow(self):
+    cell = self._route[self._route_cursor]
+    if cell.samePosition(self._at) and self._planRouteTo(self._route[-1]):
+      cell = self._route[0]
+    node = self._nodeBy(cell)
+
+    if not cell.isEmpty() and self._interactWith(node):
+      return
+
+    if not cell.isEmpty() and self._route_cursor == len(self._route) - 1:
+      self._log.debug("Soldier #{}".format(str(self._id)), "The end of the Route is taken")
+      self._resetRoute()
+      self._resetState()
+      return
+
+    if not cell.samePosition(self._at) and not self.mapTo(node):
+      if not self._detourFlow() or self._routeFinished():
+        return
+      cell = self._route[0]
+      if not cell.samePosition(self._at) and not self.mapTo(self._nodeBy(cell)):
+        return
+
+    self._route_cursor += 1
+    if not self._routeFinished():
+      self._reserveRoute(True)
+
+  """
+    Steps toward the closest Node the suspended search has found so far,
+    along its search tree, or waits when there is none, as while the
+    PathService searches
+  """
+  def _followPartialPathFlow(self):
+    path = self._astar.pathBetween(self._at, self._astar.closest)
+    if len(path) < 2:
+      self._log.debug("Soldier #{}".format(str(self._id)), "Waiting for the search to go on")
+      return
+    
+    if path[1].cell.isEmpty():
+      self.mapTo(path[1])
+    else:
+      self._interactWith(path[1])
+
+  """
+    Steps along what was left of the last Route while the PathService
+    searches the next path, False once it is walked or its next Cell is taken
+  """
+  def _followPreviousFlow(self):
+    if self._previous == None:
+      return False
+    
+    if not self.mapTo(self._nodeBy(self._previous[0])):
+      self._previous = None
+      return False
+    
+    self._previous.pop(0)
+    if len(self._previous) == 0:
+      self._previous = None
+    return True
+
+  def _followRouteTo(self, target):
+    if self._planRouteTo(target):
+      return not self._routeFinished()
+    
+    route = self._routeTo(target)
+    if route == None:
+      return False
+    
+    joined = self._routes.join(self._at, route)
+    self._charge(self._routes.expanded)
+    if joined == None:
+      return False
+    
+    walk, index = joined
+    self._route = walk + route[index + 1:]
+    self._route_cursor = 0
+    return not self._routeFinished()
+
+  def _followsRoute(self):
+    return not self._route == None
+
   def _friendlySoldierAt(self):
     for room in self._rooms:
       for cell in room.floor:
@@ -270,6 +498,9 @@ class Soldier:
     return None
   
   def _grenadePackage(self):
+    if not self._nearest == None:
+      return self._nearest.nearest(self._at, GrenadePackage)
+
     room = self._currentRoom()
     
     if room == None:
@@ -326,6 +557,32 @@ class Soldier:
 
     return result
   
+  """
+    True only when meeting what is on the node changed something, i.e. a
+    shot, a Grenade, a pickup or a shared target, so that a Soldier that
+    could not act on it goes on looking for a way around
+  """
+  def _interactWith(self, node):
+    if self._haveSpottedSoldier(node):
+      return self._spottedSoldierFlow(node)
+    
+    elif self._haveSpottedHealthPackage(node):
+      if self._isLookingForHealth():
+        self._spottedHealthPackageFlow(node)
+        return True
+
+    elif self._haveSpottedBulletPackage(node):
+      if self._isLookingForBullets():
+        self._spottedBulletPackageFlow(node)
+        return True
+
+    elif self._haveSpottedGrenadePackage(node):
+      if self._isLookingForGrenades():
+        self._spottedGrenadePackageFlow(node)
+        return True
+    
+    return False
+
   def _isLookingForBullets(self):
     return self._state == SoldierState.LOOKING_FOR_BULLETS
   
@@ -338,10 +595,24 @@ class Soldier:
   def _isNoAmmunition(self):
     return self._areNoBullets() and self._areNoGrenades()
   
+  """
+    The path the PathService found from where the Soldier asked for it,
+    joined from where it has walked since, None when it can not be joined
+  """
+  def _joinPath(self, path):
+    if len(path) == 0 or path[0].cell.samePosition(self._at):
+      return path
+    
+    joined = self._routes.join(self._at, [node.cell for node in path])
+    self._charge(self._routes.expanded)
+    if joined == None:
+      return None
+    
+    walk, index = joined
+    return [self._nodeBy(self._at)] + [self._nodeBy(cell) for cell in walk] + path[index + 1:]
+
   def _nodeBy(self, cell):
-    for node in self._nodes:
-      if node.cell.samePosition(cell):
-        return node
+    return self._astar.nodeBy(cell)
   
   def _noExistingTargetFlow(self):
     self._log.debug("Soldier #{}".format(self._id), "No Existing Target")
@@ -399,6 +670,9 @@ class Soldier:
     return False
     
   def _healthPackage(self):
+    if not self._nearest == None:
+      return self._nearest.nearest(self._at, HealthPackage)
+
     for room in self._rooms:
       for cell in room.floor:
         if cell.containsHealthPackage():
@@ -432,6 +706,14 @@ class Soldier:
       target = self._randomRoomCenter()
     
     self._came_from = self._at
+
+    if self._followRouteTo(target):
+      self._log.debug(
+        "Soldier #{}".format(self._id),
+        "Following the Route to {}".format(str(target.point))
+      )
+      return
+    
     self._astar.updateNodeToStateStartBy(self._at)
     self._astar.updateNodeToStateTargetBy(target)
     
@@ -440,6 +722,71 @@ class Soldier:
       "The picked target is {}".format(str(target.point))
     )
   
+  """
+    Searches the whole path to the target of the Astar at once and follows
+    it as a Route, the next Cell is checked before every step and the path
+    is only searched again when that Cell is blocked
+  """
+  def _planPathFlow(self):
+    target = self._astar.target
+    if not self._service == None:
+      path = self._joinPath(self._service.result(self._id))
+      if path == None:
+        self._log.debug("Soldier #{}".format(str(self._id)), "Can not join the path, asking again")
+        return True
+    elif self._budget == None:
+      path = self._astar.solve(self._at, target.cell)
+    elif self._astar.solved:
+      path = self._astar.pathBetween(self._at, target)
+    else:
+      path = []
+    
+    if self._astar.solved and len(path) == 0:
+      self._log.debug("Soldier #{}".format(str(self._id)), "Left the search tree, searching again")
+      self._astar.resetAlgorithm()
+      self._astar.updateNodeToStateStartBy(self._at)
+      self._astar.updateNodeToStateTargetBy(target.cell)
+      return True
+    
+    target = target.cell
+    self._astar.resetAlgorithm()
+    
+    if len(path) == 1:
+      self._resetState()
+      return True
+    
+    if len(path) == 0:
+      self._astar.updateNodeToStateStartBy(self._at)
+      self._astar.updateNodeToStateTargetBy(target)
+      return False
+    
+    self._log.debug(
+      "Soldier #{}".format(self._id),
+      "Planned {} steps to {}".format(len(path) - 1, str(target.point))
+    )
+    self._route = [node.cell for node in path[1:]]
+    self._route_cursor = 0
+    self._reserveRoute(False)
+    return True
+
+  """
+    Plans around the Cells the other Soldiers reserved and reserves the
+    planned Cells in turn, when the Soldier cooperates
+  """
+  def _planRouteTo(self, target):
+    if self._planner == None:
+      return False
+    
+    route = self._planner.solve(self._at, target, self._id)
+    self._charge(self._planner.expanded)
+    if route == None or len(route) < 2:
+      return False
+    
+    self._route = route[1:]
+    self._route_cursor = 0
+    self._reserveRoute(False)
+    return True
+
   def _randomCellAtRoom(self):
     result = None
     seed()
@@ -468,16 +815,137 @@ class Soldier:
     
     return result
   
+  """
+    The replanner keeps its search while the end of the Route stays the
+    same, so a Route blocked again only repairs the search around the
+    Cells that changed
+  """
+  def _replanFlow(self):
+    target = self._route[-1]
+    goal = self._replanner.goal
+    if goal == None or not goal.cell.samePosition(target):
+      self._log.debug("Soldier #{}".format(str(self._id)), "Planning the way to {}".format(str(target.point)))
+      self._replanner.plan(self._at, target)
+    else:
+      self._replanner.moveTo(self._at)
+    
+    expanded = self._replanner.expanded
+    self._replanner.sense([node.cell for node in self._nodeBy(self._at).neighbours])
+    path = self._replanner.path()
+    self._charge(self._replanner.expanded - expanded)
+    
+    if len(path) < 2:
+      self._log.debug("Soldier #{}".format(str(self._id)), "No detour, searching for the target")
+      self._resetRoute()
+      self._astar.resetAlgorithm()
+      self._astar.updateNodeToStateStartBy(self._at)
+      self._astar.updateNodeToStateTargetBy(target)
+      return False
+    
+    self._route = [node.cell for node in path[1:]]
+    self._route_cursor = 0
+    return True
+
+  """
+    The Soldier holds its Cell for the current tick, or for the next one
+    once it has moved this tick, then walks the Route one Cell a tick,
+    waiting where a Cell repeats
+  """
+  def _reserveRoute(self, moved):
+    if self._planner == None:
+      return
+    
+    first = self._planner.reservations.tick
+    if moved:
+      first += 1
+    ahead = self._route[self._route_cursor:self._route_cursor + self._planner.window]
+    self._planner.reservations.reserve(self._id, [self._at] + ahead, first)
+
+  """
+    What is left of the Route is kept as the previous one when the paths
+    come from the PathService, to be walked while the next one is searched
+  """
+  def _resetRoute(self):
+    if not self._planner == None:
+      self._planner.reservations.release(self._id)
+    self._previous = None
+    if not self._service == None and not self._route == None and self._route_cursor < len(self._route):
+      self._previous = self._route[self._route_cursor:]
+    self._route = None
+    self._route_cursor = 0
+
   def _resetState(self):
     self._state = SoldierState.DISCOVERING
   
+  """
+    Heads back to where the Soldier came from, what was left of the Route
+    leads to the enemy and is not walked while the way back is searched
+  """
   def _reverseTarget(self):
     self._log.debug("Soldier #{}".format(str(self._id)), "Reversing the Target")
     start = self.start()
+    self._resetRoute()
+    self._previous = None
     self._astar.resetAlgorithm()
     self._astar.updateNodeToStateStartBy(self._at)
     self._astar.updateNodeToStateTargetBy(start.cell)
     
+  """
+    Room centers are looked up in the RouteTable from inside a Room, any
+    other target is read from its flow field, shared by every Soldier
+    heading there, or found through the PathCache when there are no fields.
+    Outside a Room the search for the closest entrance is charged
+  """
+  def _routeTo(self, target):
+    if self._routes == None or self._paths == None:
+      return None
+    
+    discovering = self._state == SoldierState.DISCOVERING
+    if discovering and not self._currentRoom() == None:
+      return self._routes.routeFrom(self._at, target)
+
+    if not self._flows == None:
+      return self._flows.route(self._at, target)
+
+    if discovering:
+      route = self._routes.routeFrom(self._at, target)
+      self._charge(self._routes.expanded)
+      return route
+    
+    path = self._paths.path(self._at, target)
+    self._charge(self._paths.expanded)
+    return path
+
+  def _routeFinished(self):
+    if self._route_cursor < len(self._route):
+      return False
+    
+    self._log.debug("Soldier #{}".format(str(self._id)), "Reached the end of the Route")
+    self._resetRoute()
+    self._resetState()
+    return True
+
+  """
+    True once the search for the target of the Astar is over. The
+    PathService is asked for it until the path is there, without one it is
+    over at once when there is no budget, otherwise when it ends within
+    what is left of the budget of the tick
+  """
+  def _searchOver(self):
+    if not self._service == None:
+      self._service.request(self._id, self._at, self._astar.target.cell)
+      return self._service.ready(self._id)
+    
+    if self._budget == None:
+      return True
+    
+    expanded = self._astar.expanded
+    over = self._astar.resume(max(self._budget.left, 0))
+    self._budget.spend(self._astar.expanded - expanded)
+    if not over:
+      self._budget.suspend()
+    return over
+
   def _shootAt(self, other):
     self._log.debug(
       "Soldier #{}".format(str(self._id)),
@@ -563,21 +1031,26 @@ class Soldier:
     return False
   
   def _spottedEnemyFlow(self, other):
-    if other._at.isPath():
-      if self._isNoAmmunition() or self._isLowHealth():
-        self._reverseTarget()
-      else:
-        if not self._areNoGrenades():
-          self._throwGrenadeAt(other)
-        else:
-          self._shootAt(other)
+    if not other._at.isPath():
+      return False
+    
+    if self._isNoAmmunition() or self._isLowHealth():
+      self._reverseTarget()
+    elif not self._areNoGrenades():
+      self._throwGrenadeAt(other)
+    else:
+      self._shootAt(other)
+    return True
   
   def _spottedFriendFlow(self, other):
-    if other._at.isPath():
-      if not self.target():
-        other.shareTargetWith(self)
-      else:
-        self.shareTargetWith(other)
+    if not other._at.isPath():
+      return False
+    
+    if not self.target():
+      other.shareTargetWith(self)
+    else:
+      self.shareTargetWith(other)
+    return True
    
   def _spottedBulletPackageFlow(self, node):
     self._log.debug("Soldier #{}".format(str(self._id)), "Spotted a Bullet Package")
@@ -593,6 +1066,7 @@ class Soldier:
       exit(1)
     
     node.cell.removeObj()
+    self._resetRoute()
     self._astar.resetAlgorithm()
     self._resetState()
     
@@ -612,6 +1086,7 @@ class Soldier:
       exit(1)
     
     node.cell.removeObj()
+    self._resetRoute()
     self._astar.resetAlgorithm()
     self._resetState()
     
@@ -628,6 +1103,7 @@ class Soldier:
       self._health = restored_health
     
     node.cell.removeObj()
+    self._resetRoute()
     self._resetState()
     self._astar.resetAlgorithm()
 
@@ -640,13 +1116,13 @@ class Soldier:
         "Soldier #{}".format(str(self._id)),
         "Spotted a Friend #{}".format(str(other.id))
       )
-      self._spottedFriendFlow(other)
+      return self._spottedFriendFlow(other)
     else:
       self._log.debug(
         "Soldier #{}".format(str(self._id)),
         "Spotted an Enemy #{}".format(str(self._id))
       )
-      self._spottedEnemyFlow(other)
+      return self._spottedEnemyFlow(other)
     
   def _teamMates(self, other):
     return self._team_id == other.team_id
@@ -0,0 +1,90 @@
+"""
+  Counters of the work done by path searches, for one search or summed
+  over many of them, i.e. all the searches of a Soldier or of a tick
+"""
+class SearchStats:
+
+  """
+    - edge_lookups is Integer
+    - expanded is Integer, Nodes taken off the open list and expanded
+    - heap_operations is Integer, pushes, pops and decreases on the open list
+    - path_length is Integer, Nodes on the paths found
+    - pushed is Integer, Nodes pushed to the open list
+    - searches is Integer
+    - time is Number, wall-clock seconds spent searching
+  """
+  def __init__(self, searches=0, expanded=0, pushed=0, heap_operations=0, edge_lookups=0, path_length=0, time=0):
+    self._edge_lookups = edge_lookups
+    self._expanded = expanded
+    self._heap_operations = heap_operations
+    self._path_length = path_length
+    self._pushed = pushed
+    self._searches = searches
+    self._time = time
+
+  @property
+  def edge_lookups(self):
+    return self._edge_lookups
+
+  @property
+  def expanded(self):
+    return self._expanded
+
+  @property
+  def heap_operations(self):
+    return self._heap_operations
+
+  @property
+  def path_length(self):
+    return self._path_length
+
+  @property
+  def pushed(self):
+    return self._pushed
+
+  @property
+  def searches(self):
+    return self._searches
+
+  @property
+  def time(self):
+    return self._time
+
+  def add(self, other):
+    self._edge_lookups += other.edge_lookups
+    self._expanded += other.expanded
+    self._heap_operations += other.heap_operations
+    self._path_length += other.path_length
+    self._pushed += other.pushed
+    self._searches += other.searches
+    self._time += other.time
+
+  def copy(self):
+    result = SearchStats()
+    result.add(self)
+    return result
+
+  """
+    The counters gathered after earlier, a snapshot of the same counters
+  """
+  def since(self, earlier):
+    return SearchStats(
+      self._searches - earlier.searches,
+      self._expanded - earlier.expanded,
+      self._pushed - earlier.pushed,
+      self._heap_operations - earlier.heap_operations,
+      self._edge_lookups - earlier.edge_lookups,
+      self._path_length - earlier.path_length,
+      self._time - earlier.time
+    )
+
+  def __str__(self):
+    return "{} searches -- {} expanded -- {} pushed -- {} heap operations -- {} edge lookups -- {} path length -- {:.1f} ms".format(
+      self._searches,
+      self._expanded,
+      self._pushed,
+      self._heap_operations,
+      self._edge_lookups,
+      self._path_length,
+      self._time * 1000
+    )